@@ -0,0 +1,304 @@
+# benchmark_gerenciador.py
+# Benchmarks dos caminhos quentes do gerenciador_steam sobre árvores sintéticas.
+#
+#   python benchmark_gerenciador.py                       # escala padrão
+#   python benchmark_gerenciador.py --jogos 1000 10000 100000 --usuarios 10000 --saida bench.json
+#
+# A saída é JSON (um objeto por escala, cada medição com n, total, média e
+# percentis em microssegundos) para comparar versões. Downloads rodam contra
+# uma CDN falsa local (http.server); nada sai para a rede.
+import os
+import sys
+import io
+import json
+import zlib
+import struct
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import gerenciador_steam as gs
+
+
+# ---------- Medição ----------
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    k = min(len(ordenados) - 1, max(0, int(round(p / 100 * (len(ordenados) - 1)))))
+    return ordenados[k]
+
+def medir(resultados, nome, fn, repeticoes=1, ops_por_rep=1, **extra):
+    # roda fn() `repeticoes` vezes; cada chamada conta como `ops_por_rep` operações
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    tempos.sort()
+    total = sum(tempos)
+    ops = repeticoes * ops_por_rep
+    r = {
+        "nome": nome,
+        "repeticoes": repeticoes,
+        "ops": ops,
+        "total_s": round(total, 6),
+        "media_us": round(total / ops * 1e6, 3),
+        "p50_us": round(_percentil(tempos, 50) / ops_por_rep * 1e6, 3),
+        "p95_us": round(_percentil(tempos, 95) / ops_por_rep * 1e6, 3),
+        "p99_us": round(_percentil(tempos, 99) / ops_por_rep * 1e6, 3),
+        "ops_s": round(ops / total, 1) if total else None,
+    }
+    r.update(extra)
+    resultados.append(r)
+    print(f"  {nome:<40} {r['media_us']:>12.1f} us/op  ({ops} ops)", file=sys.stderr)
+    return r
+
+
+# ---------- Dados sintéticos ----------
+def _png_solido(largura, altura, rgb):
+    # PNG RGB de uma cor só, montado à mão (para quando PIL não está instalado)
+    def bloco(tipo, dados):
+        return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+    linhas = (b"\x00" + bytes(rgb) * largura) * altura
+    return (b"\x89PNG\r\n\x1a\n" + bloco(b"IHDR", struct.pack(">IIBBBBB", largura, altura, 8, 2, 0, 0, 0))
+            + bloco(b"IDAT", zlib.compress(linhas)) + bloco(b"IEND", b""))
+
+def _imagem_exemplo():
+    # bytes de uma capa "header.jpg" (460x215); sem PIL, um PNG válido do mesmo tamanho
+    Image = gs._opcional("PIL.Image")
+    if Image is None:
+        return _png_solido(460, 215, (30, 60, 90)), "png"
+    buf = io.BytesIO()
+    Image.new("RGB", (460, 215), (30, 60, 90)).save(buf, format="JPEG", quality=85)
+    return buf.getvalue(), "jpg"
+
+def construir_arvore(base, n_jogos, n_usuarios, linhas_log, jogos_por_usuario, semente=1):
+    rnd = random.Random(semente)
+    gs.configurar_diretorios(base)
+    for d in (gs.JOGOS_DIR, gs.DOCS_DIR, gs.LOGS_DIR, gs.USUARIOS_DIR):
+        os.makedirs(d, exist_ok=True)
+
+    capa, ext = _imagem_exemplo()
+    nomes = [f"Jogo Sintetico {i:06d}" for i in range(n_jogos)]
+    for i, nome in enumerate(nomes):
+        pasta = os.path.join(gs.JOGOS_DIR, nome)
+        os.makedirs(pasta, exist_ok=True)
+        with open(os.path.join(pasta, f"{nome}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{nome}\nDescrição automática.\n")
+        if i % 10:  # ~10% sem capa, como na vida real
+            with open(os.path.join(pasta, f"{nome}.{ext}"), "wb") as f:
+                f.write(capa)
+
+    armazem = gs.obter_armazem_usuarios()
+    usuarios = [f"user{i:06d}" for i in range(n_usuarios)]
+    con = armazem._conexao()
+    con.execute("BEGIN")
+    con.executemany("INSERT OR IGNORE INTO usuarios (nome, senha, permissao, criado_em) VALUES (?, ?, 'USUARIO', '-')",
+                    [(u, f"senha-{u}") for u in usuarios])
+    con.execute("COMMIT")
+    pares = [(u, j) for u in usuarios for j in rnd.sample(nomes, min(jogos_por_usuario, len(nomes)))]
+    armazem.adicionar_jogos(pares)
+
+    with open(gs.LOG_FILE, "w", encoding="utf-8") as f:
+        for i in range(linhas_log):
+            u = usuarios[i % len(usuarios)] if usuarios else "ninguem"
+            ts = f"2026-01-{1 + i // 100000 % 28:02d} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+            tipo = i % 10
+            if tipo < 5:
+                msg = f"Login sucesso: {u}"
+            elif tipo < 7:
+                msg = f"Login falhou: {u}"
+            elif tipo < 9:
+                msg = f"{u} adicionou {nomes[i % len(nomes)]} à biblioteca"
+            else:
+                msg = f"Imagem não encontrada na Steam CDN para {nomes[i % len(nomes)]} (HTTP 404)"
+            f.write(f"[{ts}] {msg}\n")
+    return nomes, usuarios
+
+
+# ---------- CDN falsa ----------
+def iniciar_cdn_falsa(corpo):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/steam/apps/{{appid}}/header.jpg"
+
+
+# ---------- Benchmarks ----------
+def rodar_escala(base, n_jogos, n_usuarios, linhas_log, jogos_por_usuario, amostras, n_downloads):
+    resultados = []
+    rnd = random.Random(42)
+    t0 = time.perf_counter()
+    nomes, usuarios = construir_arvore(base, n_jogos, n_usuarios, linhas_log, jogos_por_usuario)
+    print(f"árvore: {n_jogos} jogos, {n_usuarios} usuários, {linhas_log} linhas de log "
+          f"({time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+
+    # catálogo: construção a frio (um scandir por jogo) e sincronização a quente
+    def catalogo_frio():
+        gs._catalogo = None
+        gs.listar_jogos_empresa()
+    medir(resultados, "listar_jogos_empresa.frio", catalogo_frio, repeticoes=3)
+    medir(resultados, "listar_jogos_empresa.quente", gs.listar_jogos_empresa, repeticoes=20)
+
+    alvo_u = [rnd.choice(usuarios) for _ in range(amostras)] if usuarios else []
+    alvo_j = [rnd.choice(nomes) for _ in range(amostras)]
+    if alvo_u:
+        medir(resultados, "listar_biblioteca", lambda: [gs.listar_biblioteca(u) for u in alvo_u],
+              ops_por_rep=len(alvo_u))
+        # login custa um scrypt por verificação real: amostra menor, origens
+        # distintas para o limitador não transformar as falhas em rejeições
+        alvo_login = list(dict.fromkeys(alvo_u))[:20]
+        medir(resultados, "validar_login.migracao", lambda: [gs.validar_login(u, f"senha-{u}") for u in alvo_login],
+              ops_por_rep=len(alvo_login))
+        repetidos = alvo_login * 10  # já verificados acima: cache de credenciais
+        medir(resultados, "validar_login.cache", lambda: [gs.validar_login(u, f"senha-{u}") for u in repetidos],
+              ops_por_rep=len(repetidos))
+        medir(resultados, "validar_login.falha",
+              lambda: [gs.validar_login(u, "errada", origem=f"bench-{i}") for i, u in enumerate(alvo_login)],
+              ops_por_rep=len(alvo_login))
+        bloqueado = alvo_login[0]
+        for i in range(gs.LimitadorLogin.LIVRES_USUARIO + 1):
+            gs.validar_login(bloqueado, "errada", origem="bench-bloqueio")
+        medir(resultados, "validar_login.bloqueado",
+              lambda: [gs.validar_login(bloqueado, "errada", origem="bench-bloqueio") for _ in alvo_u],
+              ops_por_rep=len(alvo_u))
+    medir(resultados, "obter_imagem_jogo", lambda: [gs.obter_imagem_jogo(j) for j in alvo_j],
+          ops_por_rep=len(alvo_j))
+    if alvo_u:
+        pares = list(zip(alvo_u, alvo_j))
+        medir(resultados, "adicionar_jogo_a_usuario", lambda: [gs.adicionar_jogo_a_usuario(u, j) for u, j in pares],
+              ops_por_rep=len(pares))
+        medir(resultados, "adicionar_jogos_a_usuario.lote50",
+              lambda: gs.adicionar_jogos_a_usuario(alvo_u[0], nomes[:50]), ops_por_rep=1)
+
+        # equivalente ao refresh_all sem Tk: listas + diff contra o estado anterior
+        anterior_jogos = gs.listar_jogos_empresa()
+        anterior_bib = gs.listar_biblioteca(alvo_u[0])
+        def refresh():
+            gs.operacoes_diff(anterior_jogos, gs.listar_jogos_empresa())
+            gs.operacoes_diff(anterior_bib, gs.listar_biblioteca(alvo_u[0]))
+        medir(resultados, "refresh_all.equivalente", refresh, repeticoes=20)
+        alterado = list(anterior_jogos)
+        alterado.insert(len(alterado) // 2, "Jogo Novo")
+        medir(resultados, "operacoes_diff.1_insercao", lambda: gs.operacoes_diff(anterior_jogos, alterado), repeticoes=5)
+
+    # decodificação/redimensionamento de capa (miniatura fria e quente)
+    if gs._opcional("PIL.Image") is not None:
+        com_capa = [gs.obter_catalogo().obter(j) for j in alvo_j[:50]]
+        com_capa = [e for e in com_capa if e and e.imagem]
+        cache = gs.CacheMiniaturas(pasta=os.path.join(base, "bench_miniaturas"))
+        medir(resultados, "miniatura.gerar", lambda: [cache.gerar(e.imagem, e.mtime, gs.TAMANHO_CAPA) for e in com_capa],
+              ops_por_rep=max(1, len(com_capa)))
+        medir(resultados, "miniatura.obter_do_disco",
+              lambda: [cache.obter(e.imagem, e.mtime, gs.TAMANHO_CAPA) for e in com_capa],
+              ops_por_rep=max(1, len(com_capa)))
+    else:
+        resultados.append({"nome": "miniatura.*", "pulado": "PIL não instalado"})
+
+    # log: vazão de escrita, leitura paginada, filtro e análise incremental
+    n_log = 20000
+    def escrever_log():
+        for i in range(n_log):
+            gs.registrar_log(f"benchmark linha {i}")
+    medir(resultados, "registrar_log.enfileirar", escrever_log, ops_por_rep=n_log)
+    medir(resultados, "registrar_log.flush", lambda: gs._registrador.flush(30))
+    medir(resultados, "log.ultimas_500_linhas", lambda: gs.ler_linhas_anteriores(gs.LOG_FILE, n=500), repeticoes=10)
+    medir(resultados, "log.filtrar_500", lambda: gs.filtrar_log(gs.LOG_FILE, "Login falhou", limite=500), repeticoes=10)
+    analise = gs.AnaliseLog(checkpoint=os.path.join(base, "bench_analise.json"))
+    medir(resultados, "analise_log.fria", analise.atualizar, linhas=linhas_log)
+    gs.registrar_log("Login sucesso: user000000")
+    medir(resultados, "analise_log.incremental", analise.atualizar)
+
+    # downloads contra a CDN falsa local
+    if gs._opcional("requests") is not None and n_downloads:
+        corpo = _imagem_exemplo()[0]
+        servidor, url = iniciar_cdn_falsa(corpo)
+        motor = gs.MotorDownloads(max_workers=8, url_template=url)
+        jogos = [(f"Download {i:05d}", 900000 + i) for i in range(n_downloads)]
+        def baixar():
+            for f in motor.baixar_todos(jogos):
+                f.exception()
+        try:
+            medir(resultados, "downloads.cdn_local", baixar, ops_por_rep=n_downloads, workers=8)
+        finally:
+            motor.shutdown()
+            servidor.shutdown()
+            servidor.server_close()
+    else:
+        resultados.append({"nome": "downloads.cdn_local", "pulado": "requests não instalado"})
+
+    gs._registrador.flush(30)
+    return resultados
+
+
+def _versao():
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do gerenciador_steam")
+    parser.add_argument("--jogos", type=int, nargs="+", default=[1000], help="tamanhos de catálogo (uma rodada por valor)")
+    parser.add_argument("--usuarios", type=int, default=10000)
+    parser.add_argument("--linhas-log", type=int, default=200000)
+    parser.add_argument("--jogos-por-usuario", type=int, default=5)
+    parser.add_argument("--amostras", type=int, default=1000, help="operações por medição aleatória")
+    parser.add_argument("--downloads", type=int, default=200)
+    parser.add_argument("--saida", help="arquivo JSON (padrão: stdout)")
+    parser.add_argument("--manter", action="store_true", help="não apaga as árvores sintéticas")
+    args = parser.parse_args(argv)
+
+    relatorio = {
+        "versao": _versao(),
+        "quando": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "pil": gs._opcional("PIL.Image") is not None,
+        "requests": gs._opcional("requests") is not None,
+        "escalas": [],
+    }
+    for n_jogos in args.jogos:
+        base = tempfile.mkdtemp(prefix=f"steam_bench_{n_jogos}_")
+        try:
+            resultados = rodar_escala(base, n_jogos, args.usuarios, args.linhas_log,
+                                      args.jogos_por_usuario, args.amostras, args.downloads)
+            relatorio["escalas"].append({"jogos": n_jogos, "usuarios": args.usuarios,
+                                         "linhas_log": args.linhas_log, "resultados": resultados})
+        finally:
+            gs._reiniciar_singletons()
+            if not args.manter:
+                shutil.rmtree(base, ignore_errors=True)
+
+    saida = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(saida + "\n")
+    else:
+        print(saida)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# deixa os testes em tests/ importarem gerenciador_steam da raiz do repositório
@@ -1,46 +1,94 @@
 # gerenciador_steam_tk_full.py
 import os
-import shutil
-import tkinter as tk
-from tkinter import messagebox, simpledialog, filedialog
-from tkinter import ttk
 from datetime import datetime
 import getpass
 import threading
 import io
+import time
+import sys
+import struct
+import ctypes
+import ctypes.util
+import difflib
+import hashlib
+import queue
+import mmap
+import sqlite3
+import atexit
+import json
+import re
+import importlib
+import argparse
+import hmac
+import secrets
+import base64
+import functools
+import bisect
+import unicodedata
+import urllib.parse
+import warnings
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import OrderedDict
 
-# Dependências opcionais
-try:
-    import requests
-except Exception:
-    requests = None
+# Dependências opcionais (requests, PIL, fpdf2) e o próprio tkinter são
+# importados só quando usados: o modo headless não paga por eles.
+_opcionais = {}
 
-try:
-    from PIL import Image, ImageTk
-    PIL_AVAILABLE = True
-except Exception:
-    PIL_AVAILABLE = False
+def _opcional(nome):
+    # módulo importado, ou None se não estiver instalado
+    if nome not in _opcionais:
+        try:
+            _opcionais[nome] = importlib.import_module(nome)
+        except Exception:
+            _opcionais[nome] = None
+    return _opcionais[nome]
 
-# fpdf2
-try:
-    from fpdf import FPDF
-    FPDF_AVAILABLE = True
-except Exception:
-    FPDF_AVAILABLE = False
+tk = ttk = messagebox = simpledialog = filedialog = None  # preenchidos por _carregar_tk()
+
+def _carregar_tk():
+    global tk, ttk, messagebox, simpledialog, filedialog
+    import tkinter as tk
+    from tkinter import messagebox, simpledialog, filedialog
+    from tkinter import ttk
+    import tkinter.font
 
 # ---------- Configuração de paths (Documentos) ----------
 def get_documents_path():
     home = os.path.expanduser("~")
     return os.path.join(home, "Documents" if os.name == "nt" else "Documentos")
 
-BASE_DIR = os.path.join(get_documents_path(), "steam_files")
-EMPRESA_DIR = os.path.join(BASE_DIR, "Empresa")
-USUARIOS_DIR = os.path.join(BASE_DIR, "Usuarios")
-JOGOS_DIR = os.path.join(EMPRESA_DIR, "Jogos")
-DOCS_DIR = os.path.join(EMPRESA_DIR, "Documentos")
-LOGS_DIR = os.path.join(EMPRESA_DIR, "Logs")
-LOG_FILE = os.path.join(LOGS_DIR, "Log_Sistema.txt")
-IMAGES_DIR = os.path.join(EMPRESA_DIR, "Imagens_Jogos")  # backup/central images folder
+def configurar_diretorios(base=None):
+    # define (ou troca, ex.: --base na CLI) a raiz de todos os arquivos;
+    # STEAM_FILES_DIR no ambiente substitui o padrão em Documentos
+    global BASE_DIR, EMPRESA_DIR, USUARIOS_DIR, JOGOS_DIR, DOCS_DIR, LOGS_DIR, LOG_FILE, IMAGES_DIR
+    global MINIATURAS_DIR, USUARIOS_DB, BOOTSTRAP_MANIFEST, RELATORIOS_MANIFEST, ANALISE_CHECKPOINT, PACOTE_IMAGENS
+    BASE_DIR = base or os.environ.get("STEAM_FILES_DIR") or os.path.join(get_documents_path(), "steam_files")
+    EMPRESA_DIR = os.path.join(BASE_DIR, "Empresa")
+    USUARIOS_DIR = os.path.join(BASE_DIR, "Usuarios")
+    JOGOS_DIR = os.path.join(EMPRESA_DIR, "Jogos")
+    DOCS_DIR = os.path.join(EMPRESA_DIR, "Documentos")
+    LOGS_DIR = os.path.join(EMPRESA_DIR, "Logs")
+    LOG_FILE = os.path.join(LOGS_DIR, "Log_Sistema.txt")
+    IMAGES_DIR = os.path.join(EMPRESA_DIR, "Imagens_Jogos")  # backup/central images folder
+    PACOTE_IMAGENS = os.path.join(IMAGES_DIR, "capas.pack")  # opcional: todas as capas num arquivo só
+    MINIATURAS_DIR = os.path.join(EMPRESA_DIR, "Cache_Miniaturas")  # capas já redimensionadas
+    USUARIOS_DB = os.path.join(USUARIOS_DIR, "usuarios.db")  # cadastro de usuários (SQLite)
+    BOOTSTRAP_MANIFEST = os.path.join(EMPRESA_DIR, "bootstrap.json")
+    RELATORIOS_MANIFEST = os.path.join(DOCS_DIR, "relatorios.json")  # arquivo -> hash do conteúdo
+    ANALISE_CHECKPOINT = os.path.join(LOGS_DIR, "analise_log.json")
+    _reiniciar_singletons()
+
+def _reiniciar_singletons():
+    # caches/conexões presos aos caminhos antigos
+    global _catalogo, _armazem, _miniaturas, _analise, _pacote
+    if globals().get("_registrador") is not None:
+        _registrador.fechar()
+    if globals().get("_pacote"):
+        _pacote.fechar()
+    _catalogo = _armazem = _miniaturas = _analise = _pacote = None
+
+configurar_diretorios()
 
 # ---------- Lista de 50 jogos reais e APP IDs (para header images da Steam) ----------
 # OBS: os app ids não precisam estar 100% corretos para todos, mas usamos IDs conhecidos para a maioria.
@@ -99,23 +147,358 @@ GAMES = [
 
 STEAM_HEADER_URL = "https://cdn.cloudflare.steamstatic.com/steam/apps/{appid}/header.jpg"
 
+# ---------- Instrumentação (desligada por padrão) ----------
+class Metricas:
+    # Tempos e contadores dos caminhos quentes, com percentis sobre as últimas
+    # MAX_AMOSTRAS medições de cada nome. Desligada, cada ponto instrumentado
+    # custa só a checagem de `ativo`. Liga com STEAM_METRICAS=1, --metricas
+    # ou pelo painel de desempenho do admin.
+    MAX_AMOSTRAS = 2048
+    DESPEJO_S = 60
+
+    def __init__(self):
+        self.ativo = os.environ.get("STEAM_METRICAS") == "1"
+        self._lock = threading.Lock()
+        self._amostras = {}     # nome -> [segundos] (janela circular)
+        self._totais = {}       # nome -> [n, soma, max]
+        self._contadores = {}
+        self._despejo = None
+
+    def registrar_tempo(self, nome, segundos):
+        with self._lock:
+            tot = self._totais.get(nome)
+            if tot is None:
+                tot = self._totais[nome] = [0, 0.0, 0.0]
+                self._amostras[nome] = []
+            amostras = self._amostras[nome]
+            if len(amostras) < self.MAX_AMOSTRAS:
+                amostras.append(segundos)
+            else:
+                amostras[tot[0] % self.MAX_AMOSTRAS] = segundos
+            tot[0] += 1
+            tot[1] += segundos
+            tot[2] = max(tot[2], segundos)
+
+    def contar(self, nome, n=1):
+        if self.ativo:
+            with self._lock:
+                self._contadores[nome] = self._contadores.get(nome, 0) + n
+
+    def zerar(self):
+        with self._lock:
+            self._amostras.clear()
+            self._totais.clear()
+            self._contadores.clear()
+
+    def resumo(self):
+        # {"tempos": {nome: {n, media_ms, p50_ms, p95_ms, p99_ms, max_ms}}, "contadores": {...}}
+        with self._lock:
+            itens = [(n, sorted(self._amostras[n]), list(t)) for n, t in self._totais.items()]
+            contadores = dict(self._contadores)
+        tempos = {}
+        for nome, ordenadas, (n, soma, maximo) in itens:
+            pct = lambda p: ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))] * 1000
+            tempos[nome] = {"n": n, "media_ms": round(soma / n * 1000, 3), "p50_ms": round(pct(50), 3),
+                            "p95_ms": round(pct(95), 3), "p99_ms": round(pct(99), 3),
+                            "max_ms": round(maximo * 1000, 3)}
+        return {"tempos": tempos, "contadores": contadores}
+
+    def despejar(self, caminho=None):
+        caminho = caminho or os.path.join(LOGS_DIR, "metricas.json")
+        dados = dict(self.resumo(), gerado_em=datetime.now().isoformat())
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        tmp = caminho + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, caminho)
+        return caminho
+
+    def ativar(self, ativo=True):
+        self.ativo = ativo
+        if ativo and self._despejo is None:
+            self._despejo = threading.Thread(target=self._loop_despejo, name="steam-metricas", daemon=True)
+            self._despejo.start()
+
+    def _loop_despejo(self):
+        while True:
+            time.sleep(self.DESPEJO_S)
+            if self.ativo:
+                try:
+                    self.despejar()
+                except OSError:
+                    pass
+
+metricas = Metricas()
+
+def instrumentar(nome):
+    # decorator: mede a duração da chamada quando as métricas estão ligadas
+    def deco(fn):
+        @functools.wraps(fn)
+        def medido(*args, **kwargs):
+            if not metricas.ativo:
+                return fn(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metricas.registrar_tempo(nome, time.perf_counter() - inicio)
+        return medido
+    return deco
+
+class MonitorLagTk:
+    # Agenda um callback a cada `intervalo_ms` e mede o atraso com que ele roda:
+    # atraso acima de `limite_ms` significa que algo bloqueou a thread do Tk.
+    def __init__(self, root, intervalo_ms=100, limite_ms=200):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.limite_ms = limite_ms
+        self.bloqueios = 0
+        self._job = None
+        self._esperado = None
+
+    def iniciar(self):
+        if self._job is None:
+            self._esperado = time.perf_counter() + self.intervalo_ms / 1000
+            self._job = self.root.after(self.intervalo_ms, self._tique)
+
+    def parar(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _tique(self):
+        agora = time.perf_counter()
+        atraso_ms = max(0.0, (agora - self._esperado) * 1000)
+        metricas.registrar_tempo("tk.lag", atraso_ms / 1000)
+        if atraso_ms > self.limite_ms:
+            self.bloqueios += 1
+            metricas.contar("tk.bloqueios")
+            registrar_log(f"Loop do Tk bloqueado por {atraso_ms:.0f} ms")
+        self._esperado = agora + self.intervalo_ms / 1000
+        self._job = self.root.after(self.intervalo_ms, self._tique)
+
 # ---------- Logging pequeno ----------
+class RegistradorLog:
+    # Escrita do log numa thread própria: quem chama só enfileira (timestamp,
+    # mensagem). A thread mantém o arquivo aberto, grava em lotes (até `lote`
+    # linhas ou `intervalo` segundos) e rotaciona por tamanho mantendo
+    # `backups` arquivos antigos (Log_Sistema.txt.1, .2, ...).
+    def __init__(self, caminho=None, max_bytes=5 * 1024 * 1024, backups=5, lote=256, intervalo=0.5):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lote = lote
+        self.intervalo = intervalo
+        self._fila = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._arquivo = None
+        self._tamanho = 0
+
+    def registrar(self, msg):
+        self._fila.put((time.time(), msg))
+        if self._thread is None:
+            self._iniciar()
+
+    def _iniciar(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="steam-log", daemon=True)
+                self._thread.start()
+
+    def _abrir(self):
+        caminho = self.caminho or LOG_FILE
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        self._arquivo = open(caminho, "a", encoding="utf-8")
+        self._tamanho = self._arquivo.tell()
+
+    def _rotacionar(self):
+        caminho = self.caminho or LOG_FILE
+        self._arquivo.close()
+        self._arquivo = None
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{caminho}.{i}"):
+                os.replace(f"{caminho}.{i}", f"{caminho}.{i + 1}")
+        if self.backups > 0:
+            os.replace(caminho, f"{caminho}.1")
+        else:
+            os.remove(caminho)
+        self._abrir()
+
+    def _conferir_arquivo(self):
+        # outro processo (CLI e GUI ao mesmo tempo) pode ter rotacionado ou
+        # escrito no log: reabre se o caminho aponta para outro arquivo (como
+        # o WatchedFileHandler do logging) e usa o tamanho real, não o contado
+        try:
+            st = os.stat(self.caminho or LOG_FILE)
+            aberto = os.fstat(self._arquivo.fileno())
+        except OSError:
+            st = aberto = None
+        if st is None or (st.st_dev, st.st_ino) != (aberto.st_dev, aberto.st_ino):
+            self._arquivo.close()
+            self._abrir()
+        else:
+            self._tamanho = st.st_size
+
+    def _gravar(self, linhas):
+        if not linhas:
+            return
+        try:
+            if self._arquivo is None:
+                self._abrir()
+            else:
+                self._conferir_arquivo()
+            for linha in linhas:
+                tam = len(linha.encode("utf-8"))
+                if self._tamanho and self._tamanho + tam > self.max_bytes:
+                    self._rotacionar()
+                self._arquivo.write(linha)
+                self._tamanho += tam
+            self._arquivo.flush()
+        except OSError:
+            # disco cheio/sem permissão: não derruba a aplicação por causa do log
+            self._arquivo = None
+
+    def _loop(self):
+        while True:
+            item = self._fila.get()
+            linhas, avisos, parar = [], [], False
+            limite = time.monotonic() + self.intervalo
+            while True:
+                if item is None:
+                    parar = True
+                elif isinstance(item, threading.Event):
+                    avisos.append(item)
+                else:
+                    ts, msg = item
+                    linhas.append(f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))}] {msg}\n")
+                if parar or avisos or len(linhas) >= self.lote:
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+            self._gravar(linhas)
+            for ev in avisos:
+                ev.set()
+            if parar:
+                if self._arquivo is not None:
+                    self._arquivo.close()
+                    self._arquivo = None
+                return
+
+    def flush(self, timeout=5):
+        # espera tudo que já foi enfileirado chegar ao disco
+        if self._thread is None or not self._thread.is_alive():
+            return
+        ev = threading.Event()
+        self._fila.put(ev)
+        ev.wait(timeout)
+
+    def fechar(self, timeout=5):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._fila.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+_registrador = RegistradorLog()
+
+def _fechar_log():
+    _registrador.fechar()
+
+atexit.register(_fechar_log)
+
+@instrumentar("registrar_log")
 def registrar_log(msg):
-    os.makedirs(LOGS_DIR, exist_ok=True)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}\n")
+    _registrador.registrar(msg)
 
 # ---------- Helpers para nomes de arquivos seguros ----------
 def safe_name(name: str) -> str:
     return "".join(c if c.isalnum() or c in " ._-()" else "_" for c in name).strip()
 
 # ---------- Função para baixar imagem e salvar como PNG (quando possível) ----------
-def download_and_prepare_image(game_name: str, appid: int):
+# Status HTTP que valem nova tentativa (erros transitórios da CDN)
+HTTP_RETENTAVEIS = (429, 500, 502, 503, 504)
+
+def _get_com_retentativas(http, url, timeout=12, tentativas=1, backoff=0.5, headers=None, parar=None):
+    # backoff exponencial: backoff, 2*backoff, 4*backoff...
+    # `parar` (threading.Event) interrompe as retentativas (ex.: encerramento)
+    ultimo_erro = None
+    for i in range(max(1, tentativas)):
+        if i:
+            atraso = backoff * (2 ** (i - 1))
+            if parar is not None:
+                if parar.wait(atraso):
+                    break
+            else:
+                time.sleep(atraso)
+        try:
+            resp = http.get(url, timeout=timeout, headers=headers)
+        except Exception as e:
+            ultimo_erro = e
+            continue
+        if resp.status_code in HTTP_RETENTAVEIS and i < tentativas - 1 and not (parar and parar.is_set()):
+            continue
+        return resp
+    raise ultimo_erro or RuntimeError("download interrompido")
+
+def _gravar_atomico(caminho, dados):
+    # escreve ao lado e troca com os.replace: quem lê nunca vê arquivo pela metade
+    tmp = f"{caminho}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(dados)
+    os.replace(tmp, caminho)
+    return caminho
+
+def _codificar_capa(conteudo):
+    # -> ("png", bytes, None) com PIL; ("jpg", bytes originais, erro ou None) sem
+    Image = _opcional("PIL.Image")
+    if not Image:
+        return "jpg", conteudo, None
+    try:
+        buf = io.BytesIO()
+        Image.open(io.BytesIO(conteudo)).convert("RGBA").save(buf, format="PNG")
+        return "png", buf.getvalue(), None
+    except Exception as e:
+        return "jpg", conteudo, e
+
+# Metadados de cada capa em <nome>.meta.json, ao lado da imagem:
+# {"url", "etag", "last_modified", "sha256" (do corpo baixado), "verificado_em"}
+def caminho_meta_capa(imagem):
+    return os.path.splitext(imagem)[0] + ".meta.json"
+
+def ler_meta_capa(imagem):
+    try:
+        with open(caminho_meta_capa(imagem), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _gravar_meta_capa(imagem, url, resp, sha256=None, anterior=None):
+    meta = dict(anterior or {})
+    meta.update(url=url, verificado_em=datetime.now().isoformat())
+    if resp.headers.get("ETag"):
+        meta["etag"] = resp.headers["ETag"]
+    if resp.headers.get("Last-Modified"):
+        meta["last_modified"] = resp.headers["Last-Modified"]
+    if sha256:
+        meta["sha256"] = sha256
+    _gravar_atomico(caminho_meta_capa(imagem), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    return meta
+
+@instrumentar("download_and_prepare_image")
+def download_and_prepare_image(game_name: str, appid: int, session=None, tentativas=1, backoff=0.5, url_template=None,
+                               parar=None):
+    requests = _opcional("requests")
     if not requests:
         registrar_log(f"Requests não disponível — não foi possível baixar imagem para {game_name}")
         return None
 
-    url = STEAM_HEADER_URL.format(appid=appid)
+    url = (url_template or STEAM_HEADER_URL).format(appid=appid)
     pasta = os.path.join(JOGOS_DIR, safe_name(game_name))
     os.makedirs(pasta, exist_ok=True)
     png_path = os.path.join(pasta, f"{safe_name(game_name)}.png")
@@ -126,27 +509,21 @@ def download_and_prepare_image(game_name: str, appid: int):
         return png_path
 
     try:
-        resp = requests.get(url, timeout=12)
+        resp = _get_com_retentativas(session or requests, url, timeout=12, tentativas=tentativas, backoff=backoff,
+                                     parar=parar)
         if resp.status_code == 200 and resp.content:
-            # se PIL disponível, converte para PNG (garante compatibilidade com Tkinter)
-            if PIL_AVAILABLE:
-                try:
-                    img = Image.open(io.BytesIO(resp.content)).convert("RGBA")
-                    img.save(png_path, format="PNG")
-                    registrar_log(f"Imagem baixada e convertida (PNG): {game_name}")
-                    return png_path
-                except Exception as e:
-                    # fallback salvar jpg
-                    with open(jpg_temp_path, "wb") as f:
-                        f.write(resp.content)
-                    registrar_log(f"PIL falhou convertendo imagem de {game_name}: {e} — salvo como JPG")
-                    return jpg_temp_path
+            # se PIL disponível, converte para PNG (garante compatibilidade com Tkinter);
+            # sem PIL (ou se a conversão falhar) salva o JPG original
+            formato, dados, erro = _codificar_capa(resp.content)
+            destino = _gravar_atomico(png_path if formato == "png" else jpg_temp_path, dados)
+            _gravar_meta_capa(destino, url, resp, hashlib.sha256(resp.content).hexdigest())
+            if formato == "png":
+                registrar_log(f"Imagem baixada e convertida (PNG): {game_name}")
+            elif erro:
+                registrar_log(f"PIL falhou convertendo imagem de {game_name}: {erro} — salvo como JPG")
             else:
-                # sem PIL, salvamos como JPG e retorno (Tkinter pode ou não abrir)
-                with open(jpg_temp_path, "wb") as f:
-                    f.write(resp.content)
                 registrar_log(f"Imagem baixada (JPG, sem PIL): {game_name}")
-                return jpg_temp_path
+            return destino
         else:
             registrar_log(f"Imagem não encontrada na Steam CDN para {game_name} (HTTP {resp.status_code})")
             return None
@@ -154,164 +531,2443 @@ def download_and_prepare_image(game_name: str, appid: int):
         registrar_log(f"Erro baixando imagem para {game_name}: {e}")
         return None
 
+@instrumentar("revalidar_capa")
+def revalidar_capa(game_name: str, appid: int, session=None, tentativas=1, backoff=0.5, url_template=None,
+                   parar=None):
+    # GET condicional (If-None-Match / If-Modified-Since) para uma capa que já
+    # existe. Devolve "inalterada", "atualizada", "erro" ou None (sem capa local).
+    requests = _opcional("requests")
+    nome = safe_name(game_name)
+    pasta = os.path.join(JOGOS_DIR, nome)
+    imagem = next((c for c in (os.path.join(pasta, f"{nome}.png"), os.path.join(pasta, f"{nome}.jpg"))
+                   if os.path.exists(c)), None)
+    if not requests or imagem is None:
+        return None
+    url = (url_template or STEAM_HEADER_URL).format(appid=appid)
+    meta = ler_meta_capa(imagem)
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        resp = _get_com_retentativas(session or requests, url, timeout=12, tentativas=tentativas,
+                                     backoff=backoff, headers=headers, parar=parar)
+        if resp.status_code == 304:
+            _gravar_meta_capa(imagem, url, resp, anterior=meta)
+            return "inalterada"
+        if resp.status_code != 200 or not resp.content:
+            registrar_log(f"Revalidação da capa de {game_name} falhou (HTTP {resp.status_code})")
+            return "erro"
+        sha = hashlib.sha256(resp.content).hexdigest()
+        formato, dados, _ = _codificar_capa(resp.content)
+        destino = os.path.join(pasta, f"{nome}.{formato}")
+        if sha != meta.get("sha256"):
+            # capa sem metadados (baixada antes dos sidecars): compara o arquivo gerado
+            try:
+                with open(destino, "rb") as f:
+                    igual = f.read() == dados
+            except OSError:
+                igual = False
+            if not igual:
+                _gravar_atomico(destino, dados)
+                _gravar_meta_capa(destino, url, resp, sha, anterior=meta)
+                registrar_log(f"Capa atualizada na CDN: {game_name}")
+                return "atualizada"
+        _gravar_meta_capa(destino, url, resp, sha, anterior=meta)
+        return "inalterada"
+    except Exception as e:
+        registrar_log(f"Erro revalidando capa de {game_name}: {e}")
+        return "erro"
+
+# ---------- Motor de downloads (pool limitado + sessão keep-alive) ----------
+class MotorDownloads:
+    # Todos os downloads (carga inicial e sob demanda) passam por aqui:
+    # um pool com no máximo `max_workers` conexões simultâneas e uma única
+    # requests.Session, para reaproveitar as conexões com a CDN.
+    # Downloads são "single-flight" por appid (quem pede de novo recebe o
+    # mesmo Future) e falhas recentes ficam num cache negativo com backoff.
+    FALHA_TTL_BASE = 30      # segundos até a 1ª nova tentativa
+    FALHA_TTL_MAX = 3600     # teto do backoff
+
+    def __init__(self, max_workers=6, tentativas=3, backoff=0.5, url_template=None):
+        self.max_workers = max_workers
+        self.tentativas = tentativas
+        self.backoff = backoff
+        self.url_template = url_template
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="steam-dl")
+        self._session = None
+        self._lock = threading.Lock()
+        self._em_andamento = {}  # appid -> Future
+        self._falhas = {}        # appid -> (expira_em, n_falhas)
+        self._encerrando = threading.Event()
+
+    def _sessao(self):
+        with self._lock:
+            if self._session is None:
+                requests = _opcional("requests")
+                s = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                self._session = s
+            return self._session
+
+    def _executar(self, game_name, appid):
+        caminho = download_and_prepare_image(game_name, appid, session=self._sessao(),
+                                             tentativas=self.tentativas, backoff=self.backoff,
+                                             url_template=self.url_template, parar=self._encerrando)
+        if caminho:
+            obter_catalogo().atualizar(safe_name(game_name))
+        return caminho
+
+    def _executar_revalidacao(self, game_name, appid):
+        status = revalidar_capa(game_name, appid, session=self._sessao(), tentativas=self.tentativas,
+                                backoff=self.backoff, url_template=self.url_template, parar=self._encerrando)
+        if status == "atualizada":
+            # novo mtime no índice -> nova chave (path, mtime) nos caches de imagem
+            obter_catalogo().atualizar(safe_name(game_name))
+        return status
+
+    def revalidar(self, game_name, appid, callback=None):
+        # mesmo pool e sessão dos downloads; single-flight por appid
+        chave = ("revalidar", appid)
+        with self._lock:
+            fut = self._em_andamento.get(chave)
+            if fut is None:
+                fut = self._executor.submit(self._executar_revalidacao, game_name, appid)
+                self._em_andamento[chave] = fut
+                fut.add_done_callback(lambda f: self._em_andamento.pop(chave, None))
+        if callback:
+            fut.add_done_callback(lambda f: callback(None if f.cancelled() or f.exception() else f.result()))
+        return fut
+
+    def _registrar_resultado(self, appid, fut):
+        ok = not fut.cancelled() and not fut.exception() and fut.result()
+        with self._lock:
+            self._em_andamento.pop(appid, None)
+            if ok:
+                self._falhas.pop(appid, None)
+            else:
+                n = self._falhas.get(appid, (0, 0))[1] + 1
+                ttl = min(self.FALHA_TTL_BASE * (2 ** (n - 1)), self.FALHA_TTL_MAX)
+                self._falhas[appid] = (time.monotonic() + ttl, n)
+
+    def em_falha_recente(self, appid):
+        with self._lock:
+            falha = self._falhas.get(appid)
+            return bool(falha and falha[0] > time.monotonic())
+
+    def submit(self, game_name, appid, callback=None):
+        # callback(resultado) roda na thread do worker ao terminar
+        with self._lock:
+            fut = self._em_andamento.get(appid)
+            if fut is None:
+                falha = self._falhas.get(appid)
+                if falha and falha[0] > time.monotonic():
+                    # falhou há pouco: não bate na CDN de novo até o backoff expirar
+                    fut = Future()
+                    fut.set_result(None)
+                else:
+                    fut = self._executor.submit(self._executar, game_name, appid)
+                    self._em_andamento[appid] = fut
+                    fut.add_done_callback(lambda f: self._registrar_resultado(appid, f))
+        if callback:
+            fut.add_done_callback(lambda f: callback(None if f.cancelled() or f.exception() else f.result()))
+        return fut
+
+    def baixar_todos(self, jogos, progresso=None, ao_concluir=None):
+        # progresso(concluidos, total, nome, caminho) / ao_concluir(ok, total)
+        jogos = list(jogos)
+        total = len(jogos)
+        estado = {"concluidos": 0, "ok": 0}
+        lock = threading.Lock()
+
+        def _fim(nome, caminho):
+            with lock:
+                estado["concluidos"] += 1
+                estado["ok"] += 1 if caminho else 0
+                concluidos, ok = estado["concluidos"], estado["ok"]
+            if progresso:
+                progresso(concluidos, total, nome, caminho)
+            if concluidos == total and ao_concluir:
+                ao_concluir(ok, total)
+
+        futs = [self.submit(nome, appid, callback=lambda c, n=nome: _fim(n, c)) for nome, appid in jogos]
+        if not jogos and ao_concluir:
+            ao_concluir(0, 0)
+        return futs
+
+    def shutdown(self, wait=False, cancel_futures=True):
+        self._encerrando.set()  # downloads em andamento não fazem novas tentativas
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+_motor_downloads = None
+_motor_lock = threading.Lock()
+
+def obter_motor_downloads():
+    global _motor_downloads
+    with _motor_lock:
+        if _motor_downloads is None:
+            _motor_downloads = MotorDownloads()
+        return _motor_downloads
+
+def encerrar_downloads():
+    # descarta os downloads ainda na fila; sem isso, na saída do interpretador
+    # o pool roda a fila inteira (cada item até timeout * tentativas)
+    with _motor_lock:
+        motor = _motor_downloads
+    if motor is not None:
+        motor.shutdown(cancel_futures=True)
+
+# os workers do ThreadPoolExecutor são juntados *antes* dos handlers do atexit;
+# threading._register_atexit roda antes desse join (cai no atexit se não existir)
+getattr(threading, "_register_atexit", atexit.register)(encerrar_downloads)
+
+class RevalidadorCapas:
+    # Passada periódica em background: revalida as capas cuja última
+    # verificação tem mais de `intervalo` segundos. Capas iguais custam um 304;
+    # as trocadas avisam os ouvintes (ex.: a GUI) com o nome do jogo.
+    INTERVALO_S = int(os.environ.get("STEAM_REVALIDAR_S", 6 * 3600))
+    ATRASO_INICIAL_S = 60  # não concorre com a carga inicial
+
+    def __init__(self, intervalo=None):
+        self.intervalo = intervalo or self.INTERVALO_S
+        self._ouvintes = []
+        self._parar = threading.Event()
+        self._thread = None
+
+    def ouvir(self, funcao):
+        self._ouvintes.append(funcao)
+
+    def _vencida(self, imagem):
+        verificado = ler_meta_capa(imagem).get("verificado_em")
+        try:
+            idade = (datetime.now() - datetime.fromisoformat(verificado)).total_seconds()
+        except (TypeError, ValueError):
+            return True
+        return idade >= self.intervalo
+
+    def executar(self, forcar=False):
+        if not _opcional("requests"):
+            return {}
+        catalogo = obter_catalogo()
+        alvos = []
+        for nome in catalogo.sincronizar():
+            e = catalogo.obter(nome)
+            # capas do pacote não têm sidecar; só as soltas são revalidadas
+            if (e and e.appid and e.imagem and not e.imagem.startswith(PREFIXO_PACOTE)
+                    and (forcar or self._vencida(e.imagem))):
+                alvos.append((e.exibicao, e.appid))
+        motor = obter_motor_downloads()
+        futs = [(nome, motor.revalidar(nome, appid)) for nome, appid in alvos]
+        contagem = {}
+        for nome, fut in futs:
+            status = None if fut.cancelled() or fut.exception() else fut.result()
+            contagem[status or "erro"] = contagem.get(status or "erro", 0) + 1
+            if status == "atualizada":
+                for ouvinte in self._ouvintes:
+                    ouvinte(safe_name(nome))
+        if alvos:
+            registrar_log(f"Revalidação de capas: {contagem}")
+        return contagem
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="steam-revalidar", daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _loop(self):
+        espera = self.ATRASO_INICIAL_S
+        while not self._parar.wait(espera):
+            try:
+                self.executar()
+            except Exception as e:
+                registrar_log(f"Erro na revalidação de capas: {e}")
+            espera = self.intervalo
+
+_revalidador = None
+
+def obter_revalidador():
+    global _revalidador
+    with _motor_lock:
+        if _revalidador is None:
+            _revalidador = RevalidadorCapas()
+        return _revalidador
+
 # ---------- Criação de relatórios em PDF (fpdf2) ----------
-def criar_relatorios_pdf():
-    os.makedirs(DOCS_DIR, exist_ok=True)
-    if not FPDF_AVAILABLE:
-        # fallback: criar txts
-        for i in range(1, 11):
-            p = os.path.join(DOCS_DIR, f"Relatorio_{i}.txt")
-            if not os.path.exists(p):
-                with open(p, "w", encoding="utf-8") as f:
-                    f.write(f"Relatório {i}\nGerado automaticamente em {datetime.now().isoformat()}\n")
-        registrar_log("FPDF não disponível — relatórios salvos como TXT")
-        return
+def _coletar_relatorios():
+    # dados reais de cada relatório: [{"arquivo", "titulo", "secoes": [(subtitulo, [linhas])]}]
+    analise = obter_analise_log().resumo(top=20)
+    catalogo = obter_catalogo()
+    nomes = catalogo.sincronizar()
+    armazem = obter_armazem_usuarios()
+    donos = dict(armazem.contagem_por_jogo())
+    com_capa = 0
+    linhas_catalogo = []
+    for nome in nomes:
+        e = catalogo.obter(nome)
+        com_capa += 1 if e.imagem else 0
+        linhas_catalogo.append(f"{e.exibicao} | appid {e.appid or '-'} | capa {e.formato or 'ausente'} | "
+                               f"{donos.get(nome, 0)} donos")
 
-    for i in range(1, 11):
-        path = os.path.join(DOCS_DIR, f"Relatorio_{i}.pdf")
-        if os.path.exists(path):
-            continue
+    total_usuarios = armazem.contar()
+    tamanhos = armazem.tamanhos_bibliotecas(limite=50)
+    ranking = sorted(donos.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    linhas_acessos = [f"{u}: {a['ok']} logins, {a['falhas']} falhas, último login {a['ultimo_login'] or '-'}"
+                      for u, a in sorted(analise["usuarios"].items())]
+    horas = analise["logins_por_hora"]
+    linhas_horas = [f"{h}h: {sum(horas[h].values())} logins" for h in sorted(horas)[-24:]]
+
+    return [
+        {"arquivo": "Relatorio_Catalogo", "titulo": "Catálogo de jogos",
+         "secoes": [("Resumo", [f"Jogos no catálogo: {len(nomes)}", f"Com capa: {com_capa}",
+                                f"Sem capa: {len(nomes) - com_capa}"]),
+                    ("Jogos", linhas_catalogo),
+                    ("Downloads de capas (log)", [f"Sucesso: {analise['downloads_ok']}",
+                                                  f"Erros: {analise['downloads_erros']}"]
+                     + [f"{t}: {n}" for t, n in sorted(analise["erros_por_tipo"].items())]
+                     + [f"Erros em {j}: {n}" for j, n in analise["jogos_com_mais_erros"]])]},
+        {"arquivo": "Relatorio_Bibliotecas", "titulo": "Bibliotecas dos usuários",
+         "secoes": [("Resumo", [f"Usuários: {total_usuarios}",
+                                f"Jogos em bibliotecas: {sum(donos.values())}"]),
+                    ("Jogos mais presentes", [f"{j}: {n} usuários" for j, n in ranking[:50]]),
+                    ("Jogos mais adicionados (log)", [f"{j}: {n}" for j, n in analise["jogos_mais_adicionados"]]),
+                    ("Maiores bibliotecas", [f"{u}: {n} jogos" for u, n in tamanhos])]},
+        {"arquivo": "Relatorio_Acessos", "titulo": "Atividade de login",
+         "secoes": [("Resumo", [f"Logins com sucesso: {analise['logins']}", f"Logins falhos: {analise['falhas']}",
+                                f"Taxa de falha: {analise['taxa_falha']:.1%}"]),
+                    ("Últimas 24 horas com atividade", linhas_horas),
+                    ("Por usuário", linhas_acessos)]},
+    ]
+
+def _renderizar_relatorio(caminho, titulo, secoes, gerado_em, usar_pdf):
+    # roda num processo separado do pool; só recebe dados prontos
+    if not usar_pdf:
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(f"{titulo}\nGerado automaticamente em {gerado_em}\n")
+            for subtitulo, linhas in secoes:
+                f.write(f"\n{subtitulo}\n")
+                f.writelines(f"  {l}\n" for l in linhas)
+        return caminho
+    from fpdf import FPDF
+
+    def latin1(t):
+        # fontes core do PDF só têm latin-1
+        return t.encode("latin-1", "replace").decode("latin-1")
+
+    # aviso de API obsoleta do fpdf2 vira erro: aparece no log em vez de passar em silêncio
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
         pdf = FPDF()
         pdf.add_page()
-        pdf.set_font("Arial", size=14)
-        pdf.cell(0, 10, txt=f"Relatório {i} - Steam Empresa", ln=True, align="C")
-        pdf.ln(6)
-        pdf.set_font("Arial", size=11)
-        pdf.multi_cell(0, 8, txt=f"Relatório gerado automaticamente em {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n"
-                                 f"Jogos cadastrados: {len(GAMES)}\n")
-        pdf.output(path)
-    registrar_log("Relatórios PDF criados")
+        pdf.set_font("Helvetica", size=14)
+        pdf.cell(0, 10, text=latin1(f"{titulo} - Steam Empresa"), new_x="LMARGIN", new_y="NEXT", align="C")
+        pdf.set_font("Helvetica", size=9)
+        pdf.cell(0, 6, text=latin1(f"Gerado automaticamente em {gerado_em}"), new_x="LMARGIN", new_y="NEXT",
+                 align="C")
+        for subtitulo, linhas in secoes:
+            pdf.ln(4)
+            pdf.set_font("Helvetica", "B", size=12)
+            pdf.cell(0, 8, text=latin1(subtitulo), new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font("Helvetica", size=10)
+            for l in linhas:
+                pdf.multi_cell(0, 6, text=latin1(l), new_x="LMARGIN", new_y="NEXT")
+        pdf.output(caminho)
+    return caminho
 
-# ---------- Inicialização da estrutura (50 jogos + relatórios) ----------
-def criar_estrutura_inicial(download_images=True):
-    os.makedirs(JOGOS_DIR, exist_ok=True)
+def criar_relatorios_pdf(forcar=False):
+    # Coleta os dados no processo atual, compara o hash de cada relatório com
+    # o manifesto e renderiza só os que mudaram, em paralelo num pool de processos.
     os.makedirs(DOCS_DIR, exist_ok=True)
-    os.makedirs(LOGS_DIR, exist_ok=True)
-    os.makedirs(USUARIOS_DIR, exist_ok=True)
-
-    # Criar pastas de jogos e metadata
-    for name, appid in GAMES:
-        pasta = os.path.join(JOGOS_DIR, safe_name(name))
-        os.makedirs(pasta, exist_ok=True)
-        txt = os.path.join(pasta, f"{safe_name(name)}.txt")
-        if not os.path.exists(txt):
-            with open(txt, "w", encoding="utf-8") as f:
-                f.write(f"{name}\nDescrição automática.\nGerado em {datetime.now().isoformat()}\n")
-    criar_relatorios_pdf()
+    usar_pdf = _opcional("fpdf") is not None
+    ext = "pdf" if usar_pdf else "txt"
+    try:
+        with open(RELATORIOS_MANIFEST, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        manifesto = {}
+
+    pendentes = []
+    for r in _coletar_relatorios():
+        h = hashlib.sha1(json.dumps([ext, r["titulo"], r["secoes"]], ensure_ascii=False).encode("utf-8")).hexdigest()
+        caminho = os.path.join(DOCS_DIR, f"{r['arquivo']}.{ext}")
+        if not forcar and manifesto.get(r["arquivo"]) == h and os.path.exists(caminho):
+            continue
+        pendentes.append((r, h, caminho))
+    if not pendentes:
+        return []
+
+    gerado_em = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    args = [(caminho, r["titulo"], r["secoes"], gerado_em, usar_pdf) for r, _h, caminho in pendentes]
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    erros = {}  # arquivo -> exceção do próprio relatório (os outros seguem)
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(len(args), os.cpu_count() or 1), mp_context=ctx) as pool:
+            futs = [pool.submit(_renderizar_relatorio, *a) for a in args]
+            for (r, _h, _c), fut in zip(pendentes, futs):
+                try:
+                    fut.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    erros[r["arquivo"]] = e
+    except (OSError, NotImplementedError, BrokenProcessPool) as e:
+        # sem processos (ambiente restrito): renderiza aqui mesmo
+        registrar_log(f"Pool de processos indisponível para relatórios ({e}) — gerando em sequência")
+        erros = {}
+        for (r, _h, _c), a in zip(pendentes, args):
+            try:
+                _renderizar_relatorio(*a)
+            except Exception as e:
+                erros[r["arquivo"]] = e
+    for arquivo, e in erros.items():
+        registrar_log(f"Erro ao gerar {arquivo}: {e!r}")
+    pendentes = [p for p in pendentes if p[0]["arquivo"] not in erros]
+    if not pendentes:
+        return []
+
+    for r, h, _caminho in pendentes:
+        manifesto[r["arquivo"]] = h
+    tmp = RELATORIOS_MANIFEST + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2)
+    os.replace(tmp, RELATORIOS_MANIFEST)
+    gerados = [os.path.basename(c) for _r, _h, c in pendentes]
+    if not usar_pdf:
+        registrar_log("FPDF não disponível — relatórios salvos como TXT")
+    registrar_log(f"Relatórios atualizados: {', '.join(gerados)}")
+    return gerados
+
+# ---------- Inicialização da estrutura (50 jogos + relatórios) ----------
+BOOTSTRAP_VERSAO = 1  # incrementar quando o que a inicialização cria mudar
+
+@contextmanager
+def _medir_fase(tempos, nome):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[nome] = round((time.perf_counter() - inicio) * 1000, 1)  # ms
+
+def _assinatura_bootstrap():
+    return hashlib.sha1(repr((BOOTSTRAP_VERSAO, GAMES)).encode("utf-8")).hexdigest()
+
+def _ler_manifesto_bootstrap():
+    try:
+        with open(BOOTSTRAP_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _gravar_manifesto_bootstrap(dados):
+    tmp = BOOTSTRAP_MANIFEST + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, BOOTSTRAP_MANIFEST)
+
+def _preparar_pasta_jogo(name):
+    pasta = os.path.join(JOGOS_DIR, safe_name(name))
+    os.makedirs(pasta, exist_ok=True)
+    txt = os.path.join(pasta, f"{safe_name(name)}.txt")
+    if not os.path.exists(txt):
+        with open(txt, "w", encoding="utf-8") as f:
+            f.write(f"{name}\nDescrição automática.\nGerado em {datetime.now().isoformat()}\n")
+
+def criar_estrutura_inicial(download_images=True, em_background=False):
+    # Parte síncrona mínima (pastas base + usuários padrão, necessários para
+    # o login). O resto roda em background quando em_background=True, e numa
+    # inicialização "quente" (manifesto com a mesma assinatura e nenhuma
+    # pasta de jogo faltando) as verificações por jogo são puladas. Os
+    # relatórios ficam por último e só são renderizados se o conteúdo mudou.
+    tempos = {}
+    with _medir_fase(tempos, "diretorios"):
+        os.makedirs(JOGOS_DIR, exist_ok=True)
+        os.makedirs(DOCS_DIR, exist_ok=True)
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        os.makedirs(USUARIOS_DIR, exist_ok=True)
 
     # Usuarios padrão
-    if not os.path.exists(os.path.join(USUARIOS_DIR, "admin")):
-        criar_usuario("admin", "1234", "ADMIN")
-    if not os.path.exists(os.path.join(USUARIOS_DIR, "ryan")):
-        criar_usuario("ryan", "1234", "USUARIO")
-
-    registrar_log("Estrutura inicial criada (jogos e relatórios).")
-
-    # Baixar imagens em thread para não travar GUI startup
-    if download_images and requests:
-        def bg_download():
-            registrar_log("Iniciando download de imagens dos jogos (background).")
-            for name, appid in GAMES:
-                download_and_prepare_image(name, appid)
-            registrar_log("Download de imagens concluído.")
-        t = threading.Thread(target=bg_download, daemon=True)
+    with _medir_fase(tempos, "usuarios"):
+        armazem = obter_armazem_usuarios()
+        if not armazem.existe("admin"):
+            criar_usuario("admin", "1234", "ADMIN")
+        if not armazem.existe("ryan"):
+            criar_usuario("ryan", "1234", "USUARIO")
+
+    def restante():
+        # perfis antigos entram no banco com a senha em texto puro: o hash
+        # sai daqui mesmo para quem nunca mais fizer login
+        with _medir_fase(tempos, "senhas"):
+            migrar_senhas()
+        with _medir_fase(tempos, "manifesto"):
+            assinatura = _assinatura_bootstrap()
+            quente = _ler_manifesto_bootstrap().get("assinatura") == assinatura
+            existentes = set(obter_catalogo().sincronizar())
+            faltando = [n for n, _a in GAMES if safe_name(n) not in existentes]
+        # Criar pastas de jogos e metadata (em paralelo, só o necessário)
+        with _medir_fase(tempos, "jogos"):
+            pendentes = faltando if quente else [n for n, _a in GAMES]
+            if pendentes:
+                with ThreadPoolExecutor(max_workers=8, thread_name_prefix="steam-init") as pool:
+                    list(pool.map(_preparar_pasta_jogo, pendentes))
+                obter_catalogo().sincronizar()
+        if not quente or faltando:
+            _gravar_manifesto_bootstrap({"versao": BOOTSTRAP_VERSAO, "assinatura": assinatura,
+                                         "jogos": len(GAMES), "gerado_em": datetime.now().isoformat()})
+            registrar_log("Estrutura inicial criada (jogos).")
+
+        # Baixar imagens no pool de downloads para não travar GUI startup
+        with _medir_fase(tempos, "downloads_agendados"):
+            if download_images and _opcional("requests"):
+                catalogo = obter_catalogo()
+                sem_capa = [(n, a) for n, a in GAMES if getattr(catalogo.obter(safe_name(n)), "imagem", None) is None]
+                if sem_capa:
+                    registrar_log(f"Iniciando download de {len(sem_capa)} imagens dos jogos (background).")
+                    obter_motor_downloads().baixar_todos(
+                        sem_capa,
+                        ao_concluir=lambda ok, total: registrar_log(f"Download de imagens concluído ({ok}/{total})."))
+            elif not _opcional("requests"):
+                registrar_log("requests não instalado — imagens não serão baixadas automaticamente.")
+        with _medir_fase(tempos, "relatorios"):
+            # também a quente (logins e bibliotecas mudam entre execuções): a
+            # coleta é barata e só o relatório cujo conteúdo mudou é renderizado
+            criar_relatorios_pdf()
+        registrar_log(f"Inicialização ({'quente' if quente else 'fria'}) em ms por fase: {tempos}")
+
+    if em_background:
+        t = threading.Thread(target=restante, name="steam-bootstrap", daemon=True)
         t.start()
-    elif not requests:
-        registrar_log("requests não instalado — imagens não serão baixadas automaticamente.")
+        return t
+    restante()
+    return None
 
 # ---------- Usuários ----------
+def _ler_perfil_txt(caminho):
+    # formato antigo: linhas "Chave:valor" (Usuário/Senha/Permissão)
+    with open(caminho, "r", encoding="utf-8") as f:
+        campos = dict(l.split(":", 1) for l in f.read().splitlines() if ":" in l)
+    return {k.strip(): v.strip() for k, v in campos.items()}
+
+# Senhas: guardadas como "scrypt$n$r$p$sal$hash" (ou "pbkdf2_sha256$iter$sal$hash"
+# quando o OpenSSL não tem scrypt). Texto puro antigo ainda é aceito e é
+# trocado pelo hash no bootstrap (migrar_senhas) ou no primeiro login.
+SCRYPT_N = int(os.environ.get("STEAM_SCRYPT_N", 2 ** 14))
+SCRYPT_R, SCRYPT_P = 8, 1
+PBKDF2_ITERACOES = int(os.environ.get("STEAM_PBKDF2_ITER", 240000))
+_TEM_SCRYPT = hasattr(hashlib, "scrypt")
+
+def _b64(dados):
+    return base64.b64encode(dados).decode("ascii")
+
+def _derivar(algoritmo, params, senha, sal):
+    if algoritmo == "scrypt":
+        n, r, p = params
+        return hashlib.scrypt(senha.encode("utf-8"), salt=sal, n=n, r=r, p=p, maxmem=256 * r * n + 1024 * 1024)
+    return hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal, params[0])
+
+def _parametros_atuais():
+    return ("scrypt", (SCRYPT_N, SCRYPT_R, SCRYPT_P)) if _TEM_SCRYPT else ("pbkdf2_sha256", (PBKDF2_ITERACOES,))
+
+def hash_senha(senha):
+    algoritmo, params = _parametros_atuais()
+    sal = secrets.token_bytes(16)
+    return "$".join([algoritmo, *map(str, params), _b64(sal), _b64(_derivar(algoritmo, params, senha, sal))])
+
+def _decodificar_hash(armazenado):
+    # (algoritmo, params, sal, hash) ou None para texto puro (formato antigo)
+    partes = armazenado.split("$")
+    try:
+        if partes[0] == "scrypt" and len(partes) == 6:
+            params = tuple(int(x) for x in partes[1:4])
+        elif partes[0] == "pbkdf2_sha256" and len(partes) == 4:
+            params = (int(partes[1]),)
+        else:
+            return None
+        return partes[0], params, base64.b64decode(partes[-2]), base64.b64decode(partes[-1])
+    except ValueError:
+        return None
+
+def verificar_senha(senha, armazenado):
+    # -> (confere, precisa_rehash): rehash para texto puro ou parâmetros antigos
+    decodificado = _decodificar_hash(armazenado)
+    if decodificado is None:
+        return hmac.compare_digest(senha.encode("utf-8"), armazenado.encode("utf-8")), True
+    algoritmo, params, sal, esperado = decodificado
+    if algoritmo == "scrypt" and not _TEM_SCRYPT:
+        return False, False
+    confere = hmac.compare_digest(_derivar(algoritmo, params, senha, sal), esperado)
+    return confere, (algoritmo, params) != _parametros_atuais()
+
+class LimitadorLogin:
+    # Throttling de login em memória, por usuário e por origem (GUI, CLI, IP
+    # do cliente da API). Depois de `livres` falhas seguidas a chave fica
+    # bloqueada por BASE_S * 2^(excedentes), até MAX_S; a checagem é uma
+    # consulta a dict, antes de qualquer acesso ao banco ou cálculo de hash.
+    BASE_S = 1.0
+    MAX_S = 300.0
+    JANELA_S = 900          # falhas mais antigas que isso são esquecidas
+    LIVRES_USUARIO = 3
+    LIVRES_ORIGEM = 20      # uma origem tentando muitos usuários diferentes
+    MAX_CHAVES = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estado = OrderedDict()  # chave -> [falhas, ultima_falha, bloqueado_ate]
+
+    def _espera(self, chave, agora):
+        st = self._estado.get(chave)
+        if st is None:
+            return 0.0
+        if agora - st[1] > self.JANELA_S:
+            del self._estado[chave]
+            return 0.0
+        return max(0.0, st[2] - agora)
+
+    def espera(self, nome, origem):
+        # segundos até poder tentar de novo (0 = liberado)
+        agora = time.monotonic()
+        with self._lock:
+            return max(self._espera(("u", nome), agora), self._espera(("o", origem), agora))
+
+    def registrar_falha(self, nome, origem):
+        # devolve o novo bloqueio em segundos (0 se ainda dentro das livres)
+        agora = time.monotonic()
+        bloqueio = 0.0
+        with self._lock:
+            for chave, livres in ((("u", nome), self.LIVRES_USUARIO), (("o", origem), self.LIVRES_ORIGEM)):
+                self._espera(chave, agora)  # expira estado velho
+                st = self._estado.pop(chave, None) or [0, agora, 0.0]
+                st[0] += 1
+                st[1] = agora
+                if st[0] > livres:
+                    duracao = min(self.BASE_S * 2 ** (st[0] - livres - 1), self.MAX_S)
+                    st[2] = agora + duracao
+                    bloqueio = max(bloqueio, duracao)
+                self._estado[chave] = st
+            while len(self._estado) > self.MAX_CHAVES:
+                self._estado.popitem(last=False)
+        return bloqueio
+
+    def registrar_sucesso(self, nome):
+        # zera só o usuário: logar na própria conta não libera uma origem abusiva
+        with self._lock:
+            self._estado.pop(("u", nome), None)
+
+class CacheCredenciais:
+    # Logins verificados há pouco: nome -> (hmac da senha com chave do processo,
+    # hash armazenado, permissão, expira_em). Um novo login com a mesma senha
+    # e o mesmo hash no banco pula o scrypt; trocar a senha invalida a entrada.
+    TTL_S = 300
+
+    def __init__(self):
+        self._chave = secrets.token_bytes(32)
+        self._lock = threading.Lock()
+        self._entradas = {}
+
+    def _marca(self, senha):
+        return hmac.new(self._chave, senha.encode("utf-8"), "sha256").digest()
+
+    def obter(self, nome, senha, armazenado):
+        with self._lock:
+            e = self._entradas.get(nome)
+        if e and e[3] > time.monotonic() and e[1] == armazenado and hmac.compare_digest(e[0], self._marca(senha)):
+            return e[2]
+        return None
+
+    def guardar(self, nome, senha, armazenado, permissao):
+        with self._lock:
+            if len(self._entradas) > 4096:
+                agora = time.monotonic()
+                self._entradas = {k: v for k, v in self._entradas.items() if v[3] > agora}
+            self._entradas[nome] = (self._marca(senha), armazenado, permissao, time.monotonic() + self.TTL_S)
+
+    def descartar(self, nome):
+        with self._lock:
+            self._entradas.pop(nome, None)
+
+_limitador_login = LimitadorLogin()
+_credenciais = CacheCredenciais()
+_hash_ficticio = []  # gerado sob demanda (evita um scrypt no import)
+
+def _hash_para_inexistente():
+    if not _hash_ficticio:
+        _hash_ficticio.append(hash_senha(secrets.token_hex(8)))
+    return _hash_ficticio[0]
+
+class ArmazemUsuarios:
+    # Cadastro de usuários num único SQLite em modo WAL (leituras concorrentes
+    # não bloqueiam a escrita). Uma conexão por thread; `nome` é a chave
+    # primária, então login e existência são uma busca no índice.
+    def __init__(self, caminho=None):
+        self.caminho = caminho or USUARIOS_DB
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._preparado = False
+
+    def _conexao(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+            con = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA secure_delete=ON")  # senha trocada não sobra em página livre
+            self._local.con = con
+            with self._lock:
+                if not self._preparado:
+                    self._preparar(con)
+                    self._preparado = True
+        return con
+
+    def _preparar(self, con):
+        con.execute("""CREATE TABLE IF NOT EXISTS usuarios (
+                           nome TEXT PRIMARY KEY,
+                           senha TEXT NOT NULL,
+                           permissao TEXT NOT NULL,
+                           criado_em TEXT NOT NULL)""")
+        con.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)")
+        # biblioteca = referências (usuário, jogo) para o catálogo compartilhado
+        con.execute("""CREATE TABLE IF NOT EXISTS biblioteca (
+                           usuario TEXT NOT NULL,
+                           jogo TEXT NOT NULL,
+                           adicionado_em TEXT NOT NULL,
+                           PRIMARY KEY (usuario, jogo)) WITHOUT ROWID""")
+        if con.execute("SELECT 1 FROM meta WHERE chave = 'perfis_migrados'").fetchone() is None:
+            self._migrar_perfis(con)
+        if con.execute("SELECT 1 FROM meta WHERE chave = 'bibliotecas_migradas'").fetchone() is None:
+            self._migrar_bibliotecas(con)
+        if con.execute("SELECT 1 FROM meta WHERE chave = 'perfis_antigos_removidos'").fetchone() is None:
+            self.remover_perfis_migrados()
+            con.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('perfis_antigos_removidos', ?)",
+                        (datetime.now().isoformat(),))
+
+    def _migrar_perfis(self, con):
+        # migração única dos Usuarios/<nome>/Perfil.txt para o banco
+        perfis = []
+        try:
+            pastas = [e for e in os.scandir(os.path.dirname(self.caminho)) if e.is_dir()]
+        except OSError:
+            pastas = []
+        for pasta in pastas:
+            perfil = os.path.join(pasta.path, "Perfil.txt")
+            if not os.path.exists(perfil):
+                continue
+            try:
+                dados = _ler_perfil_txt(perfil)
+                perfis.append((dados.get("Usuário", pasta.name), dados["Senha"],
+                               dados.get("Permissão", "USUARIO"), perfil))
+            except (OSError, KeyError, ValueError) as e:
+                registrar_log(f"Perfil ignorado na migração ({perfil}): {e}")
+        agora = datetime.now().isoformat()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.executemany("INSERT OR IGNORE INTO usuarios (nome, senha, permissao, criado_em) VALUES (?, ?, ?, ?)",
+                            [(n, s, p, agora) for n, s, p, _ in perfis])
+            con.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('perfis_migrados', ?)", (agora,))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        # o Perfil.txt tem a senha em texto puro: não fica cópia em disco
+        for *_dados, perfil in perfis:
+            try:
+                os.remove(perfil)
+            except OSError:
+                pass
+        if perfis:
+            registrar_log(f"Perfis migrados para o banco de usuários: {len(perfis)}")
+
+    def remover_perfis_migrados(self):
+        # versões anteriores renomeavam para Perfil.txt.migrado (com a senha)
+        n = 0
+        try:
+            pastas = [e for e in os.scandir(os.path.dirname(self.caminho)) if e.is_dir()]
+        except OSError:
+            pastas = []
+        for pasta in pastas:
+            try:
+                os.remove(os.path.join(pasta.path, "Perfil.txt.migrado"))
+                n += 1
+            except OSError:
+                pass
+        if n:
+            registrar_log(f"Cópias antigas de perfis (com senha em texto puro) removidas: {n}")
+        return n
+
+    def _migrar_bibliotecas(self, con):
+        # migração única das cópias em Usuarios/<nome>/Biblioteca para referências
+        refs, arquivos = [], []
+        try:
+            pastas = [e for e in os.scandir(os.path.dirname(self.caminho)) if e.is_dir()]
+        except OSError:
+            pastas = []
+        for pasta in pastas:
+            bib = os.path.join(pasta.path, "Biblioteca")
+            try:
+                entradas = list(os.scandir(bib))
+            except OSError:
+                continue
+            for e in entradas:
+                if e.name.endswith(".txt"):
+                    refs.append((pasta.name, e.name[:-4]))
+                if e.name.endswith(".txt") or e.name.endswith(EXTENSOES_IMAGEM):
+                    arquivos.append(e.path)
+        agora = datetime.now().isoformat()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.executemany("INSERT OR IGNORE INTO biblioteca (usuario, jogo, adicionado_em) VALUES (?, ?, ?)",
+                            [(u, j, agora) for u, j in refs])
+            con.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('bibliotecas_migradas', ?)", (agora,))
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        # as cópias viraram referências: libera o espaço
+        for caminho in arquivos:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+        for pasta in pastas:
+            try:
+                os.rmdir(os.path.join(pasta.path, "Biblioteca"))
+            except OSError:
+                pass
+        if refs:
+            registrar_log(f"Bibliotecas migradas para referências: {len(refs)} jogos, {len(arquivos)} arquivos removidos")
+
+    def criar(self, nome, senha, permissao="USUARIO"):
+        cur = self._conexao().execute(
+            "INSERT OR IGNORE INTO usuarios (nome, senha, permissao, criado_em) VALUES (?, ?, ?, ?)",
+            (nome, senha, permissao, datetime.now().isoformat()))
+        return cur.rowcount == 1
+
+    def trocar_senha(self, nome, anterior, nova):
+        # só troca se ninguém mudou a senha entre a leitura e agora
+        cur = self._conexao().execute("UPDATE usuarios SET senha = ? WHERE nome = ? AND senha = ?",
+                                      (nova, nome, anterior))
+        return cur.rowcount == 1
+
+    def esvaziar_wal(self):
+        # o WAL ainda guarda as versões antigas das linhas (ex.: senha em texto puro)
+        self._conexao().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def sem_hash(self):
+        # nomes cujo registro ainda guarda a senha em texto puro
+        linhas = self._conexao().execute("SELECT nome, senha FROM usuarios").fetchall()
+        return [n for n, s in linhas if _decodificar_hash(s) is None]
+
+    def obter(self, nome):
+        # (senha armazenada (hash), permissao) ou None
+        return self._conexao().execute("SELECT senha, permissao FROM usuarios WHERE nome = ?", (nome,)).fetchone()
+
+    def existe(self, nome):
+        return self._conexao().execute("SELECT 1 FROM usuarios WHERE nome = ?", (nome,)).fetchone() is not None
+
+    def listar(self, prefixo="", limite=None):
+        # [(nome, permissao)] em ordem alfabética; o prefixo usa o índice da chave
+        sql = "SELECT nome, permissao FROM usuarios"
+        args = []
+        if prefixo:
+            sql += " WHERE nome >= ? AND nome < ?"
+            args += [prefixo, prefixo + "\U0010ffff"]
+        sql += " ORDER BY nome"
+        if limite:
+            sql += " LIMIT ?"
+            args.append(limite)
+        return self._conexao().execute(sql, args).fetchall()
+
+    def contar(self):
+        return self._conexao().execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    def adicionar_jogo(self, usuario, jogo):
+        cur = self._conexao().execute(
+            "INSERT OR IGNORE INTO biblioteca (usuario, jogo, adicionado_em) VALUES (?, ?, ?)",
+            (usuario, jogo, datetime.now().isoformat()))
+        return cur.rowcount == 1
+
+    def remover_jogo(self, usuario, jogo):
+        cur = self._conexao().execute("DELETE FROM biblioteca WHERE usuario = ? AND jogo = ?", (usuario, jogo))
+        return cur.rowcount == 1
+
+    def _executar_lote(self, sql, linhas):
+        # uma transação para o lote inteiro; devolve quantas linhas mudaram
+        con = self._conexao()
+        antes = con.total_changes
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.executemany(sql, linhas)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return con.total_changes - antes
+
+    def adicionar_jogos(self, pares):
+        agora = datetime.now().isoformat()
+        return self._executar_lote("INSERT OR IGNORE INTO biblioteca (usuario, jogo, adicionado_em) VALUES (?, ?, ?)",
+                                   [(u, j, agora) for u, j in pares])
+
+    def existentes(self, nomes):
+        # subconjunto de `nomes` cadastrado (consultas em blocos de 500)
+        nomes = list(nomes)
+        achados = set()
+        con = self._conexao()
+        for i in range(0, len(nomes), 500):
+            bloco = nomes[i:i + 500]
+            sql = f"SELECT nome FROM usuarios WHERE nome IN ({','.join('?' * len(bloco))})"
+            achados.update(r[0] for r in con.execute(sql, bloco))
+        return achados
+
+    def remover_jogos(self, pares):
+        return self._executar_lote("DELETE FROM biblioteca WHERE usuario = ? AND jogo = ?", list(pares))
+
+    def listar_biblioteca(self, usuario):
+        rows = self._conexao().execute("SELECT jogo FROM biblioteca WHERE usuario = ? ORDER BY jogo", (usuario,))
+        return [r[0] for r in rows]
+
+    def contagem_por_jogo(self):
+        return self._conexao().execute("SELECT jogo, COUNT(*) FROM biblioteca GROUP BY jogo").fetchall()
+
+    def tamanhos_bibliotecas(self, limite=50):
+        return self._conexao().execute(
+            "SELECT usuario, COUNT(*) AS n FROM biblioteca GROUP BY usuario ORDER BY n DESC, usuario LIMIT ?",
+            (limite,)).fetchall()
+
+    def versao_dados(self):
+        # muda quando outra conexão (outra thread/processo) grava no banco
+        return self._conexao().execute("PRAGMA data_version").fetchone()[0]
+
+_armazem = None
+_armazem_lock = threading.Lock()
+
+def obter_armazem_usuarios():
+    global _armazem
+    with _armazem_lock:
+        if _armazem is None:
+            _armazem = ArmazemUsuarios()
+        return _armazem
+
 def criar_usuario(nome, senha, permissao="USUARIO"):
-    user = os.path.join(USUARIOS_DIR, nome)
-    if not os.path.exists(user):
-        os.makedirs(os.path.join(user, "Biblioteca"), exist_ok=True)
-        perfil = os.path.join(user, "Perfil.txt")
-        with open(perfil, "w", encoding="utf-8") as f:
-            f.write(f"Usuário:{nome}\nSenha:{senha}\nPermissão:{permissao}\n")
+    armazem = obter_armazem_usuarios()
+    if armazem.existe(nome):
+        return False
+    if armazem.criar(nome, hash_senha(senha), permissao):
         registrar_log(f"Usuário criado: {nome} ({permissao})")
         return True
     return False
 
-def validar_login(nome, senha):
-    perfil = os.path.join(USUARIOS_DIR, nome, "Perfil.txt")
-    if not os.path.exists(perfil):
-        return None
-    with open(perfil, "r", encoding="utf-8") as f:
-        dados = f.read()
-        try:
-            s = [l for l in dados.splitlines() if l.startswith("Senha:")][0].split(":",1)[1].strip()
-            p = [l for l in dados.splitlines() if l.startswith("Permissão:")][0].split(":",1)[1].strip()
-        except Exception:
-            return None
-    if s == senha:
-        registrar_log(f"Login sucesso: {nome}")
-        return p
+def listar_usuarios(prefixo="", limite=None):
+    return obter_armazem_usuarios().listar(prefixo, limite)
+
+@instrumentar("validar_login")
+def autenticar(nome, senha, origem="local"):
+    # -> (permissao ou None, segundos de espera se a tentativa foi barrada/bloqueou)
+    espera = _limitador_login.espera(nome, origem)
+    if espera:
+        return None, espera  # rejeição barata: sem banco, sem hash, sem log
+    armazem = obter_armazem_usuarios()
+    dados = armazem.obter(nome)
+    if dados is not None:
+        armazenado, p = dados
+        if _credenciais.obter(nome, senha, armazenado) == p:
+            _limitador_login.registrar_sucesso(nome)
+            registrar_log(f"Login sucesso: {nome}")
+            return p, 0
+        confere, rehash = verificar_senha(senha, armazenado)
     else:
-        registrar_log(f"Login falhou: {nome}")
+        # usuário inexistente custa o mesmo hash, para não revelar quem existe
+        verificar_senha(senha, _hash_para_inexistente())
+        confere = False
+    if not confere:
+        bloqueio = _limitador_login.registrar_falha(nome, origem)
+        registrar_log(f"Login falhou: {nome}")  # formato lido por AnaliseLog
+        if bloqueio:
+            registrar_log(f"Login bloqueado: {nome} por {bloqueio:.0f}s")
+        return None, bloqueio
+    if rehash:
+        novo = hash_senha(senha)
+        if armazem.trocar_senha(nome, armazenado, novo):
+            armazenado = novo
+            registrar_log(f"Senha de {nome} migrada para hash")
+    _credenciais.guardar(nome, senha, armazenado, p)
+    _limitador_login.registrar_sucesso(nome)
+    registrar_log(f"Login sucesso: {nome}")
+    return p, 0
+
+def validar_login(nome, senha, origem="local"):
+    return autenticar(nome, senha, origem)[0]
+
+def migrar_senhas():
+    # converte de uma vez os registros que ainda estão em texto puro
+    armazem = obter_armazem_usuarios()
+    armazem.remover_perfis_migrados()
+    n = 0
+    for nome in armazem.sem_hash():
+        armazenado = armazem.obter(nome)[0]
+        if _decodificar_hash(armazenado) is None and armazem.trocar_senha(nome, armazenado, hash_senha(armazenado)):
+            n += 1
+    if n:
+        armazem.esvaziar_wal()
+        registrar_log(f"Senhas migradas para hash: {n}")
+    return n
+
+# ---------- Leitura paginada do log (sem carregar o arquivo inteiro) ----------
+BLOCO_LEITURA_LOG = 64 * 1024
+
+def ler_linhas_anteriores(caminho, fim=None, n=500):
+    # devolve (linhas, inicio, fim): até n linhas completas que terminam em
+    # `fim` (None = fim do arquivo), lendo de trás para frente em blocos
+    with open(caminho, "rb") as f:
+        if fim is None:
+            f.seek(0, os.SEEK_END)
+            fim = f.tell()
+        pos, dados = fim, b""
+        while pos > 0 and dados.count(b"\n") <= n:
+            ler = min(BLOCO_LEITURA_LOG, pos)
+            pos -= ler
+            f.seek(pos)
+            dados = f.read(ler) + dados
+    corte = dados.rfind(b"\n") + 1  # ignora uma última linha ainda incompleta
+    linhas = dados[:corte].split(b"\n")[:-1]
+    if pos > 0 and linhas:
+        linhas = linhas[1:]  # a primeira pode ter sido cortada no meio
+    linhas = linhas[-n:] if n else []
+    fim = pos + corte
+    inicio = fim - sum(len(l) + 1 for l in linhas)
+    return [l.decode("utf-8", "replace") for l in linhas], inicio, fim
+
+def ler_linhas_novas(caminho, desde, max_bytes=4 * 1024 * 1024):
+    # linhas completas escritas depois de `desde`; None se o arquivo encolheu (rotação)
+    try:
+        tamanho = os.path.getsize(caminho)
+    except OSError:
         return None
+    if tamanho < desde:
+        return None
+    if tamanho == desde:
+        return [], desde
+    with open(caminho, "rb") as f:
+        f.seek(desde)
+        dados = f.read(min(tamanho - desde, max_bytes))
+    corte = dados.rfind(b"\n") + 1
+    linhas = dados[:corte].split(b"\n")[:-1]
+    return [l.decode("utf-8", "replace") for l in linhas], desde + corte
+
+def filtrar_log(caminho, termo, fim=None, limite=500):
+    # as `limite` linhas mais recentes (antes de `fim`) que contêm `termo`,
+    # procurando de trás para frente num mmap; devolve (linhas, inicio, fim)
+    alvo = termo.encode("utf-8")
+    with open(caminho, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [], 0, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if fim is None:
+                fim = mm.rfind(b"\n") + 1
+            pos, achadas = fim, []
+            while len(achadas) < limite and pos > 0:
+                i = mm.rfind(alvo, 0, pos)
+                if i < 0:
+                    pos = 0
+                    break
+                ini = mm.rfind(b"\n", 0, i) + 1
+                fim_linha = mm.find(b"\n", i)
+                achadas.append(mm[ini:fim_linha if fim_linha >= 0 else len(mm)].decode("utf-8", "replace"))
+                pos = ini
+    achadas.reverse()
+    return achadas, pos, fim
+
+# ---------- Análise do log (streaming, incremental) ----------
+ANALISE_RETENCAO_HORAS = 24 * 30  # buckets por hora mais antigos que isso são descartados
+
+_RE_LINHA_LOG = re.compile(r"^\[(\d{4}-\d\d-\d\d \d\d):\d\d:\d\d\] (.*)$")
+_RE_ADICIONOU_LOTE = re.compile(r"^(\S+) adicionou \d+ jogos à biblioteca: (.*)$")
+_RE_ADICIONOU = re.compile(r"^(\S+) adicionou (.+) à biblioteca$")
+_RE_REMOVEU_LOTE = re.compile(r"^(\S+) removeu \d+ jogos da biblioteca: (.*)$")
+_RE_REMOVEU = re.compile(r"^(\S+) removeu (.+) da biblioteca$")
+_RE_CONCEDEU = re.compile(r"^\S+ concedeu \d+ jogos a (\d+) usuários \((\d+) novos\): jogos=\[(.*)\] usuarios=")
+_RE_SEM_IMAGEM = re.compile(r"^Imagem não encontrada na Steam CDN para (.+) \((HTTP \d+)\)$")
+_RE_ERRO_DOWNLOAD = re.compile(r"^Erro baixando imagem para (.+?): ")
+
+def _agregados_vazios():
+    return {"linhas": 0, "usuarios": {}, "logins_por_hora": {},
+            "downloads": {"ok": 0, "erros": 0, "por_tipo": {}},
+            "erros_por_jogo": {}, "jogos_adicionados": {}, "jogos_removidos": {}}
+
+def _somar(d, chave, n=1):
+    d[chave] = d.get(chave, 0) + n
+
+class AnaliseLog:
+    # Lê Log_Sistema.txt como stream (memória constante) a partir do último
+    # byte processado, guardado num checkpoint junto com os agregados; cada
+    # execução só processa as linhas novas. Segue a rotação do log: se o
+    # arquivo atual é outro, termina de ler o rotacionado (.1) antes.
+    def __init__(self, caminho_log=None, checkpoint=None):
+        self.caminho_log = caminho_log or LOG_FILE
+        self.checkpoint = checkpoint or ANALISE_CHECKPOINT
+        self._lock = threading.Lock()
+        self._estado = None
+
+    def _carregar(self):
+        try:
+            with open(self.checkpoint, "r", encoding="utf-8") as f:
+                estado = json.load(f)
+            estado["agregados"]
+        except (OSError, ValueError, KeyError):
+            estado = {"inode": None, "offset": 0, "agregados": _agregados_vazios()}
+        return estado
+
+    def _salvar(self, estado):
+        horas = estado["agregados"]["logins_por_hora"]
+        if len(horas) > ANALISE_RETENCAO_HORAS:
+            for h in sorted(horas)[:-ANALISE_RETENCAO_HORAS]:
+                del horas[h]
+        tmp = self.checkpoint + ".tmp"
+        os.makedirs(os.path.dirname(self.checkpoint), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(tmp, self.checkpoint)
+
+    def _processar_arquivo(self, caminho, offset, ag):
+        # devolve o offset após a última linha completa
+        with open(caminho, "rb") as f:
+            f.seek(offset)
+            for bruta in f:
+                if not bruta.endswith(b"\n"):
+                    break  # linha ainda sendo escrita: fica para a próxima
+                offset += len(bruta)
+                self._processar_linha(bruta.decode("utf-8", "replace").rstrip("\n"), ag)
+        return offset
+
+    def _processar_linha(self, linha, ag):
+        m = _RE_LINHA_LOG.match(linha)
+        if not m:
+            return
+        hora, msg = m.groups()
+        ag["linhas"] += 1
+        if msg.startswith("Login "):
+            if msg.startswith("Login sucesso: "):
+                nome, ok = msg[15:].strip(), True
+            elif msg.startswith("Login falhou: "):
+                nome, ok = msg[14:].strip(), False
+            else:
+                return
+            u = ag["usuarios"].setdefault(nome, {"ok": 0, "falhas": 0, "ultimo_login": None})
+            if ok:
+                u["ok"] += 1
+                u["ultimo_login"] = linha[1:20]
+                _somar(ag["logins_por_hora"].setdefault(hora, {}), nome)
+            else:
+                u["falhas"] += 1
+        elif msg.startswith("Imagem baixada"):
+            ag["downloads"]["ok"] += 1
+        elif msg.startswith("Imagem não encontrada") or msg.startswith("Erro baixando"):
+            ag["downloads"]["erros"] += 1
+            m2 = _RE_SEM_IMAGEM.match(msg)
+            if m2:
+                jogo, tipo = m2.groups()
+            else:
+                m2 = _RE_ERRO_DOWNLOAD.match(msg)
+                jogo, tipo = (m2.group(1) if m2 else "?"), "exceção"
+            _somar(ag["downloads"]["por_tipo"], tipo)
+            _somar(ag["erros_por_jogo"], jogo)
+        elif " adicionou " in msg:
+            m2 = _RE_ADICIONOU_LOTE.match(msg)
+            jogos = [j for j in m2.group(2).split(", ") if j] if m2 else []
+            if not m2:
+                m2 = _RE_ADICIONOU.match(msg)
+                jogos = [m2.group(2)] if m2 else []
+            for j in jogos:
+                _somar(ag["jogos_adicionados"], j)
+        elif " removeu " in msg:
+            m2 = _RE_REMOVEU_LOTE.match(msg)
+            jogos = [j for j in m2.group(2).split(", ") if j] if m2 else []
+            if not m2:
+                m2 = _RE_REMOVEU.match(msg)
+                jogos = [m2.group(2)] if m2 else []
+            for j in jogos:
+                _somar(ag["jogos_removidos"], j)
+        elif " concedeu " in msg:
+            m2 = _RE_CONCEDEU.match(msg)
+            if m2 and m2.group(3):
+                # atribuição aproximada: cada jogo para cada usuário do lote
+                for j in m2.group(3).split(", "):
+                    _somar(ag["jogos_adicionados"], j, int(m2.group(1)))
+
+    def atualizar(self):
+        with self._lock:
+            _registrador.flush(1)
+            estado = self._estado or self._carregar()
+            try:
+                st = os.stat(self.caminho_log)
+            except OSError:
+                self._estado = estado
+                return estado["agregados"]
+            inode = f"{st.st_dev}:{st.st_ino}"
+            if estado["inode"] not in (None, inode):
+                # log rotacionado: termina o arquivo antigo (se ainda estiver em .1)
+                rotacionado = f"{self.caminho_log}.1"
+                try:
+                    st1 = os.stat(rotacionado)
+                    if f"{st1.st_dev}:{st1.st_ino}" == estado["inode"]:
+                        self._processar_arquivo(rotacionado, estado["offset"], estado["agregados"])
+                except OSError:
+                    pass
+                estado["offset"] = 0
+            elif st.st_size < estado["offset"]:
+                estado["offset"] = 0  # truncado
+            estado["inode"] = inode
+            if st.st_size > estado["offset"]:
+                estado["offset"] = self._processar_arquivo(self.caminho_log, estado["offset"], estado["agregados"])
+                self._salvar(estado)
+            self._estado = estado
+            return estado["agregados"]
+
+    def resumo(self, top=10):
+        ag = self.atualizar()
+        usuarios = ag["usuarios"]
+        tentativas = sum(u["ok"] + u["falhas"] for u in usuarios.values())
+        falhas = sum(u["falhas"] for u in usuarios.values())
+        taxa = {n: round(u["falhas"] / (u["ok"] + u["falhas"]), 3)
+                for n, u in usuarios.items() if u["ok"] + u["falhas"]}
+        mais = lambda d: sorted(d.items(), key=lambda kv: (-kv[1], kv[0]))[:top]
+        return {
+            "linhas": ag["linhas"],
+            "logins": tentativas - falhas,
+            "falhas": falhas,
+            "taxa_falha": round(falhas / tentativas, 3) if tentativas else 0.0,
+            "taxa_falha_por_usuario": taxa,
+            "usuarios": usuarios,
+            "logins_por_hora": ag["logins_por_hora"],
+            "downloads_ok": ag["downloads"]["ok"],
+            "downloads_erros": ag["downloads"]["erros"],
+            "erros_por_tipo": dict(ag["downloads"]["por_tipo"]),
+            "jogos_com_mais_erros": mais(ag["erros_por_jogo"]),
+            "jogos_mais_adicionados": mais(ag["jogos_adicionados"]),
+        }
+
+_analise = None
+
+def obter_analise_log():
+    global _analise
+    if _analise is None:
+        _analise = AnaliseLog()
+    return _analise
+
+# ---------- Busca no catálogo ----------
+def normalizar_busca(texto):
+    # minúsculas, sem acentos e com pontuação/underscore virando espaço:
+    # "Pokémon_Escarlate" -> "pokemon escarlate"
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return re.sub(r"[\W_]+", " ", sem_acento.casefold()).strip()
+
+class IndiceBusca:
+    # Índice imutável sobre uma lista de nomes. Termos curtos (< 3 letras)
+    # casam por prefixo de palavra via bisect numa lista ordenada; termos
+    # maiores usam trigramas para achar candidatos e só então confirmam a
+    # substring. Vários termos são combinados com E.
+    MAX_CACHE = 64
+
+    def __init__(self, itens, rotulos=None):
+        self.itens = list(itens)
+        rotulos = rotulos or {}
+        self._textos = []
+        self._palavras = []     # (palavra, idx) ordenado
+        self._trigramas = {}    # trigrama -> [idx] crescente
+        for i, item in enumerate(self.itens):
+            texto = normalizar_busca(f"{item} {rotulos.get(item, '')}")
+            self._textos.append(texto)
+            for palavra in set(texto.split()):
+                self._palavras.append((palavra, i))
+            for tri in {texto[j:j + 3] for j in range(len(texto) - 2)}:
+                self._trigramas.setdefault(tri, []).append(i)
+        self._palavras.sort()
+        self._cache = OrderedDict()
+
+    def _por_prefixo(self, termo):
+        encontrados = set()
+        pos = bisect.bisect_left(self._palavras, (termo,))
+        while pos < len(self._palavras) and self._palavras[pos][0].startswith(termo):
+            encontrados.add(self._palavras[pos][1])
+            pos += 1
+        return encontrados
+
+    def _por_substring(self, termo):
+        listas = []
+        for j in range(len(termo) - 2):
+            lista = self._trigramas.get(termo[j:j + 3])
+            if lista is None:
+                return set()
+            listas.append(lista)
+        listas.sort(key=len)
+        candidatos = set(listas[0])
+        for lista in listas[1:]:
+            candidatos.intersection_update(lista)
+            if not candidatos:
+                return candidatos
+        return {i for i in candidatos if termo in self._textos[i]}
+
+    def buscar(self, consulta):
+        chave = normalizar_busca(consulta)
+        if not chave:
+            return self.itens
+        achado = self._cache.get(chave)
+        if achado is not None:
+            self._cache.move_to_end(chave)
+            return achado
+        indices = None
+        for termo in sorted(set(chave.split()), key=len, reverse=True):
+            parcial = self._por_prefixo(termo) if len(termo) < 3 else self._por_substring(termo)
+            indices = parcial if indices is None else indices & parcial
+            if not indices:
+                break
+        achado = [self.itens[i] for i in sorted(indices)]
+        self._cache[chave] = achado
+        if len(self._cache) > self.MAX_CACHE:
+            self._cache.popitem(last=False)
+        return achado
+
+# ---------- Pacote de imagens (arquivo único, opcional) ----------
+PREFIXO_PACOTE = "pacote://"  # caminho "virtual" de uma capa que está no pacote
+
+class PacoteImagens:
+    # Capas num único arquivo só de acréscimo, lido via mmap. Cada registro
+    # é autodescritivo (cabeçalho + nome + formato + bytes), então o índice
+    # nome -> (offset, tamanho, formato, mtime) pode ser refeito varrendo o
+    # arquivo; o snapshot em <pacote>.idx guarda até onde já foi varrido.
+    # Regravar ou remover uma capa deixa o registro antigo morto, e
+    # compactar() reescreve só os vivos.
+    MAGICO = b"CAPA"
+    CABECALHO = struct.Struct("<4sHHQd")  # mágico, len(nome), len(formato), len(dados), mtime
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or PACOTE_IMAGENS
+        self.caminho_indice = self.caminho + ".idx"
+        self._lock = threading.RLock()
+        self._indice = {}
+        self._mortos = 0
+        self._fim = 0    # até onde o arquivo já foi lido/escrito por esta instância
+        self._ino = None
+        self._mm = None
+        self._aposentados = []  # mapas antigos que ainda têm memoryviews vivas
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        open(self.caminho, "ab").close()
+        self._carregar_indice()
+
+    def _carregar_indice(self):
+        try:
+            with open(self.caminho_indice, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            snap = {}
+        st = os.stat(self.caminho)
+        self._ino = st.st_ino
+        inicio = snap.get("tamanho", 0)
+        if inicio > st.st_size or snap.get("ino") != st.st_ino:
+            inicio, snap = 0, {}  # pacote trocado (compactado por outro processo) ou truncado: varre tudo
+        self._indice = {n: tuple(v) for n, v in snap.get("entradas", {}).items()}
+        self._mortos = snap.get("mortos", 0)
+        self._fim = inicio
+        if inicio < st.st_size:
+            self._varrer(inicio, st.st_size, truncar=True)
+
+    def _varrer(self, pos, tamanho, truncar=False):
+        # lê registros gravados depois do snapshot (ou por outro processo); um
+        # registro incompleto no fim (queda no meio de uma escrita) é descartado
+        with open(self.caminho, "rb") as f:
+            f.seek(pos)
+            while pos + self.CABECALHO.size <= tamanho:
+                magico, ln, lf, ld, mtime = self.CABECALHO.unpack(f.read(self.CABECALHO.size))
+                fim = pos + self.CABECALHO.size + ln + lf + ld
+                if magico != self.MAGICO or fim > tamanho:
+                    break
+                nome = f.read(ln).decode("utf-8")
+                formato = f.read(lf).decode("ascii")
+                f.seek(ld, os.SEEK_CUR)
+                self._descartar(nome)
+                if ld:
+                    self._indice[nome] = (fim - ld, ld, formato, mtime)
+                else:
+                    self._mortos += fim - pos  # lápide (remoção)
+                pos = fim
+        self._fim = pos
+        if pos < tamanho and truncar:
+            registrar_log(f"Pacote de imagens: {tamanho - pos} bytes finais inválidos descartados")
+            with open(self.caminho, "r+b") as f:
+                f.truncate(pos)
+
+    def _descartar(self, nome):
+        antigo = self._indice.pop(nome, None)
+        if antigo is not None:
+            self._mortos += self.CABECALHO.size + len(nome.encode("utf-8")) + len(antigo[2]) + antigo[1]
+
+    def _salvar_indice(self):
+        if os.stat(self.caminho).st_ino != self._ino:
+            return  # outro processo compactou: nosso índice aponta para o arquivo antigo
+        snap = {"tamanho": self._fim, "ino": self._ino, "mortos": self._mortos, "entradas": self._indice}
+        _gravar_atomico(self.caminho_indice, json.dumps(snap, ensure_ascii=False).encode("utf-8"))
+
+    def _mapa(self, fim):
+        # remapeia quando o arquivo cresceu; o mapa antigo é fechado assim que
+        # não houver mais memoryviews (de ler()) apontando para ele
+        if fim == 0:
+            return b""  # mmap não aceita arquivo vazio
+        if self._mm is None or len(self._mm) < fim:
+            if self._mm is not None:
+                self._aposentados.append(self._mm)
+            with open(self.caminho, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._liberar_aposentados()
+        return self._mm
+
+    def _liberar_aposentados(self):
+        vivos = []
+        for mm in self._aposentados:
+            try:
+                mm.close()
+            except BufferError:
+                vivos.append(mm)  # ainda exportado
+        self._aposentados = vivos
+        return not vivos
+
+    def _liberar_mapas(self):
+        # fecha todos os mapas; False se algum ainda estiver em uso
+        if self._mm is not None:
+            self._aposentados.append(self._mm)
+            self._mm = None
+        return self._liberar_aposentados()
+
+    def _acrescentar(self, nome, formato, dados, mtime):
+        nb, fb = nome.encode("utf-8"), formato.encode("ascii")
+        with open(self.caminho, "ab") as f:
+            pos = f.tell()
+            if pos > self._fim:
+                self._varrer(self._fim, pos)  # outro processo acrescentou registros
+            f.write(self.CABECALHO.pack(self.MAGICO, len(nb), len(fb), len(dados), mtime) + nb + fb)
+            f.write(dados)
+            self._fim = f.tell()
+        return pos + self.CABECALHO.size + len(nb) + len(fb)
+
+    def gravar(self, nome, dados, formato, mtime=None):
+        with self._lock:
+            mtime = time.time() if mtime is None else mtime
+            offset = self._acrescentar(nome, formato, dados, mtime)
+            self._descartar(nome)
+            self._indice[nome] = (offset, len(dados), formato, mtime)
+            return self._indice[nome]
+
+    def remover(self, nome):
+        with self._lock:
+            if nome not in self._indice:
+                return False
+            self._acrescentar(nome, "", b"", 0.0)
+            self._descartar(nome)
+            self._mortos += self.CABECALHO.size + len(nome.encode("utf-8"))  # a própria lápide
+            return True
+
+    def info(self, nome):
+        # (offset, tamanho, formato, mtime) ou None
+        return self._indice.get(nome)
+
+    def nomes(self):
+        return list(self._indice)
+
+    def ler(self, nome):
+        # memoryview direto sobre o mmap (sem cópia); None se não houver.
+        # Enquanto a view existir o mapa não fecha e compactar() é adiado:
+        # quem chama deve liberá-la (release() ou with) ao terminar.
+        with self._lock:
+            entrada = self._indice.get(nome)
+            if entrada is None:
+                return None
+            offset, tamanho = entrada[0], entrada[1]
+            return memoryview(self._mapa(offset + tamanho))[offset:offset + tamanho]
+
+    def estatisticas(self):
+        with self._lock:
+            return {"entradas": len(self._indice), "bytes": os.path.getsize(self.caminho), "mortos": self._mortos}
+
+    def compactar(self):
+        # reescreve só os registros vivos e troca o arquivo atomicamente; adiado
+        # (devolve None) enquanto houver memoryviews de ler() ainda abertas,
+        # porque o arquivo mapeado não pode ser trocado (Windows) nem deve
+        # ficar preso em disco sem limite (POSIX)
+        with self._lock:
+            if not self._liberar_mapas():
+                registrar_log("Pacote de imagens: compactação adiada, há capas em uso")
+                return None
+            tmp = self.caminho + ".compactando"
+            novo = {}
+            with open(self.caminho, "rb") as origem, open(tmp, "wb") as f:
+                mm = mmap.mmap(origem.fileno(), 0, access=mmap.ACCESS_READ) if self._indice else None
+                try:
+                    for nome, (offset, tamanho, formato, mtime) in sorted(self._indice.items()):
+                        nb, fb = nome.encode("utf-8"), formato.encode("ascii")
+                        f.write(self.CABECALHO.pack(self.MAGICO, len(nb), len(fb), tamanho, mtime) + nb + fb)
+                        novo[nome] = (f.tell(), tamanho, formato, mtime)
+                        f.write(mm[offset:offset + tamanho])
+                finally:
+                    if mm is not None:
+                        mm.close()
+            liberados = self._mortos
+            os.replace(tmp, self.caminho)
+            st = os.stat(self.caminho)
+            self._indice, self._mortos, self._fim, self._ino = novo, 0, st.st_size, st.st_ino
+            self._salvar_indice()
+            registrar_log(f"Pacote de imagens compactado: {liberados} bytes liberados")
+            return liberados
+
+    def fechar(self):
+        with self._lock:
+            try:
+                self._salvar_indice()
+            except OSError:
+                pass
+            self._liberar_mapas()
+
+_pacote = None
+_pacote_lock = threading.Lock()
+
+def obter_pacote_imagens(criar=False):
+    # o pacote é opcional: sem o arquivo (e sem criar=True) devolve None
+    global _pacote
+    with _pacote_lock:
+        if _pacote is None and (criar or os.path.exists(PACOTE_IMAGENS)):
+            _pacote = PacoteImagens()
+            atexit.register(_pacote.fechar)
+        return _pacote
+
+class LeitorRegistro(io.RawIOBase):
+    # Arquivo somente leitura sobre o memoryview de um registro do pacote:
+    # nada é copiado ao abrir, cada read() copia só o trecho pedido. close()
+    # libera a view (e com ela o mmap, ver PacoteImagens.compactar).
+    def __init__(self, dados):
+        super().__init__()
+        self._dados = dados
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += len(self._dados)
+        if pos < 0:
+            raise ValueError("posição negativa")
+        self._pos = pos
+        return pos
+
+    def read(self, n=-1):
+        fim = len(self._dados) if n is None or n < 0 else min(self._pos + n, len(self._dados))
+        pedaco = bytes(self._dados[self._pos:fim]) if fim > self._pos else b""
+        self._pos = max(self._pos, fim)
+        return pedaco
+
+    readall = read
+
+    def readinto(self, b):
+        pedaco = self.read(len(b))
+        b[:len(pedaco)] = pedaco
+        return len(pedaco)
+
+    def close(self):
+        if not self.closed:
+            self._dados.release()
+        super().close()
+
+def abrir_capa(caminho):
+    # arquivo binário aberto com a capa (use com `with`): o arquivo real, ou
+    # um LeitorRegistro direto sobre o mmap do pacote
+    if caminho.startswith(PREFIXO_PACOTE):
+        pacote = obter_pacote_imagens()
+        dados = pacote.ler(caminho[len(PREFIXO_PACOTE):]) if pacote else None
+        if dados is None:
+            raise FileNotFoundError(caminho)
+        return LeitorRegistro(dados)
+    return open(caminho, "rb")
+
+def mtime_capa(caminho):
+    if caminho.startswith(PREFIXO_PACOTE):
+        pacote = obter_pacote_imagens()
+        entrada = pacote.info(caminho[len(PREFIXO_PACOTE):]) if pacote else None
+        if entrada is None:
+            raise FileNotFoundError(caminho)
+        return entrada[3]
+    return os.path.getmtime(caminho)
+
+def empacotar_capas(remover_soltos=False, compactar=None):
+    # copia as capas soltas (Jogos/<nome>/<nome>.png|jpg...) para o pacote;
+    # remover_soltos apaga os arquivos depois de gravados. Devolve quantas entraram.
+    pacote = obter_pacote_imagens(criar=True)
+    catalogo = obter_catalogo()
+    n = 0
+    for nome in catalogo.sincronizar():
+        e = catalogo.obter(nome)
+        if e is None or e.imagem is None or e.imagem.startswith(PREFIXO_PACOTE):
+            continue
+        atual = pacote.info(nome)
+        if atual is None or atual[3] != e.mtime or atual[2] != e.formato:
+            with open(e.imagem, "rb") as f:
+                pacote.gravar(nome, f.read(), e.formato, e.mtime)
+            n += 1
+        if remover_soltos:
+            os.remove(e.imagem)
+            if os.path.exists(caminho_meta_capa(e.imagem)):
+                os.remove(caminho_meta_capa(e.imagem))
+        catalogo.atualizar(nome)
+    est = pacote.estatisticas()
+    if compactar or (compactar is None and est["mortos"] > est["bytes"] // 2):
+        pacote.compactar()
+    pacote.fechar()
+    registrar_log(f"Capas empacotadas: {n} novas/alteradas, {len(pacote.nomes())} no pacote")
+    return n
+
+# ---------- Índice do catálogo em memória ----------
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".gif", ".ppm")
+
+class EntradaCatalogo:
+    __slots__ = ("nome", "exibicao", "appid", "imagem", "formato", "mtime")
+
+    def __init__(self, nome, exibicao=None, appid=None):
+        self.nome = nome              # nome seguro (= nome da pasta)
+        self.exibicao = exibicao or nome
+        self.appid = appid
+        self.imagem = None            # caminho da capa resolvida
+        self.formato = None           # extensão sem ponto ("png", "jpg"...)
+        self.mtime = None
+
+class CatalogoIndice:
+    # Mapeia nome da pasta <-> nome de exibição <-> appid <-> capa resolvida.
+    # Construído uma vez (um scandir por pasta de jogo) e depois atualizado
+    # por entrada, para que selecionar um jogo não precise tocar no disco.
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._por_nome = {}
+        self._por_appid = {}
+        self._por_exibicao = {}
+        self._ordenados = None
+        self._busca = None
+        self._construindo = None   # lista de nomes cujo índice está sendo montado
+        self._esperando_busca = []
+        self._conhecidos = {safe_name(n): (n, a) for n, a in GAMES}
+
+    def _resolver_imagem(self, entrada):
+        pasta = caminho_jogo(entrada.nome)
+        try:
+            arquivos = {e.name: e for e in os.scandir(pasta) if e.is_file()}
+        except OSError:
+            arquivos = {}
+        entrada.imagem = entrada.formato = entrada.mtime = None
+        for ext in EXTENSOES_IMAGEM:
+            e = arquivos.get(f"{entrada.nome}{ext}")
+            if e is not None:
+                try:
+                    entrada.mtime = e.stat().st_mtime
+                except OSError:
+                    continue
+                entrada.imagem = e.path
+                entrada.formato = ext[1:]
+                return
+        pacote = obter_pacote_imagens()
+        info = pacote.info(entrada.nome) if pacote else None
+        if info is not None:
+            entrada.imagem = PREFIXO_PACOTE + entrada.nome
+            entrada.formato, entrada.mtime = info[2], info[3]
+
+    def _adicionar(self, nome):
+        exibicao, appid = self._conhecidos.get(nome, (nome, None))
+        entrada = EntradaCatalogo(nome, exibicao, appid)
+        self._resolver_imagem(entrada)
+        self._por_nome[nome] = entrada
+        self._por_exibicao[entrada.exibicao] = entrada
+        if appid is not None:
+            self._por_appid[appid] = entrada
+        return entrada
+
+    def _remover(self, nome):
+        entrada = self._por_nome.pop(nome, None)
+        if entrada is not None:
+            self._por_exibicao.pop(entrada.exibicao, None)
+            if entrada.appid is not None and self._por_appid.get(entrada.appid) is entrada:
+                del self._por_appid[entrada.appid]
+
+    def sincronizar(self):
+        # um listdir da pasta de jogos; só resolve pastas novas e descarta as removidas
+        try:
+            no_disco = set(os.listdir(JOGOS_DIR))
+        except OSError:
+            no_disco = set()
+        with self._lock:
+            atuais = set(self._por_nome)
+            for nome in atuais - no_disco:
+                self._remover(nome)
+            for nome in no_disco - atuais:
+                self._adicionar(nome)
+            if no_disco != atuais or self._ordenados is None:
+                self._ordenados = sorted(self._por_nome)
+            return self._ordenados
+
+    def atualizar(self, nome):
+        # re-resolve uma única entrada (ex.: capa baixada ou apagada)
+        with self._lock:
+            entrada = self._por_nome.get(nome)
+            if entrada is None:
+                if os.path.isdir(caminho_jogo(nome)):
+                    entrada = self._adicionar(nome)
+                    self._ordenados = sorted(self._por_nome)
+                return entrada
+            self._resolver_imagem(entrada)
+            return entrada
+
+    def obter(self, nome):
+        return self._por_nome.get(nome)
+
+    def por_appid(self, appid):
+        return self._por_appid.get(appid)
+
+    def por_exibicao(self, exibicao):
+        return self._por_exibicao.get(exibicao)
+
+    def nomes(self):
+        with self._lock:
+            if self._ordenados is None:
+                return self.sincronizar()
+            return self._ordenados
+
+    def indice_busca(self):
+        # reconstruído só quando a lista de nomes muda (sincronizar troca _ordenados);
+        # a montagem roda fora do lock, que é o mesmo da thread do Tk
+        with self._lock:
+            nomes = self.nomes()
+            if self._busca is not None and self._busca.itens_origem is nomes:
+                return self._busca
+            rotulos = {n: e.exibicao for n, e in self._por_nome.items() if e.exibicao != n}
+        indice = IndiceBusca(nomes, rotulos)
+        indice.itens_origem = nomes
+        with self._lock:
+            if self._ordenados is nomes:
+                self._busca = indice
+        return indice
+
+    def indice_busca_async(self, ao_pronto=None):
+        # não bloqueia: devolve o índice atual (pode estar desatualizado, ou
+        # None) e, se preciso, monta um novo numa thread; ao_pronto(indice)
+        # é chamado nessa thread quando terminar
+        with self._lock:
+            nomes = self.nomes()
+            atual = self._busca
+            if atual is not None and atual.itens_origem is nomes:
+                return atual
+            if ao_pronto is not None and ao_pronto not in self._esperando_busca:
+                self._esperando_busca.append(ao_pronto)
+            if self._construindo is not nomes:
+                self._construindo = nomes
+                threading.Thread(target=self._construir_busca, args=(nomes,), name="steam-busca", daemon=True).start()
+            return atual
+
+    def _construir_busca(self, nomes):
+        try:
+            indice = self.indice_busca()
+        except Exception as e:
+            registrar_log(f"Erro montando índice de busca: {e}")
+            indice = None
+        with self._lock:
+            if self._construindo is nomes:
+                self._construindo = None
+            ouvintes, self._esperando_busca = self._esperando_busca, []
+        for ouvinte in ouvintes:
+            ouvinte(indice)
+
+_catalogo = None
+_catalogo_lock = threading.Lock()
+
+def obter_catalogo():
+    global _catalogo
+    with _catalogo_lock:
+        if _catalogo is None:
+            _catalogo = CatalogoIndice()
+            _catalogo.sincronizar()
+        return _catalogo
 
 # ---------- Operações de arquivos ----------
 def listar_jogos_empresa():
-    if not os.path.exists(JOGOS_DIR):
-        return []
-    return sorted(os.listdir(JOGOS_DIR))
+    return list(obter_catalogo().sincronizar())
+
+def buscar_jogos(consulta):
+    catalogo = obter_catalogo()
+    catalogo.sincronizar()
+    return list(catalogo.indice_busca().buscar(consulta))
 
 def caminho_jogo(nome):
     return os.path.join(JOGOS_DIR, nome)
 
 def obter_imagem_jogo(nome):
-    pasta = caminho_jogo(nome)
-    # procurar png/jpg/jpeg/gif
-    for ext in (".png", ".jpg", ".jpeg", ".gif", ".ppm"):
-        caminho = os.path.join(pasta, f"{nome}{ext}")
-        if os.path.exists(caminho):
-            return caminho
-    return None
+    # resolve pelo índice; só vai ao disco se o jogo ainda não tem capa conhecida
+    catalogo = obter_catalogo()
+    entrada = catalogo.obter(nome)
+    if entrada is None or entrada.imagem is None:
+        entrada = catalogo.atualizar(nome)
+    return entrada.imagem if entrada else None
+
+def _validar_vinculos(usuarios, jogos, ignorados=None):
+    # separa usuários cadastrados e jogos do catálogo; o que não existe vai
+    # para `ignorados` ({"usuarios": [...], "jogos": [...]}) e para o log
+    usuarios = list(dict.fromkeys(usuarios))
+    jogos = list(dict.fromkeys(jogos))
+    catalogo = obter_catalogo()
+    catalogo.sincronizar()
+    cadastrados = obter_armazem_usuarios().existentes(usuarios)
+    invalidos_u = [u for u in usuarios if u not in cadastrados]
+    invalidos_j = [j for j in jogos if catalogo.obter(j) is None]
+    if ignorados is not None:
+        ignorados["usuarios"] = invalidos_u
+        ignorados["jogos"] = invalidos_j
+    if invalidos_u or invalidos_j:
+        registrar_log(f"Vínculos ignorados: usuarios inexistentes=[{', '.join(invalidos_u)}] "
+                      f"jogos fora do catálogo=[{', '.join(invalidos_j)}]")
+    return [u for u in usuarios if u in cadastrados], [j for j in jogos if catalogo.obter(j) is not None]
 
 def adicionar_jogo_a_usuario(usuario, jogo):
-    src_txt = os.path.join(caminho_jogo(jogo), f"{jogo}.txt")
-    src_img = obter_imagem_jogo(jogo)
-    dest_pasta = os.path.join(USUARIOS_DIR, usuario, "Biblioteca")
-    os.makedirs(dest_pasta, exist_ok=True)
-    if os.path.exists(src_txt):
-        shutil.copy(src_txt, os.path.join(dest_pasta, f"{jogo}.txt"))
-    if src_img:
-        shutil.copy(src_img, os.path.join(dest_pasta, os.path.basename(src_img)))
+    # só grava a referência; capa e metadados vêm do catálogo compartilhado
+    usuarios, jogos = _validar_vinculos([usuario], [jogo])
+    if not usuarios or not jogos:
+        return False
+    obter_armazem_usuarios().adicionar_jogo(usuario, jogo)
     registrar_log(f"{usuario} adicionou {jogo} à biblioteca")
+    return True
 
 def remover_jogo_do_usuario(usuario, jogo):
-    dest_pasta = os.path.join(USUARIOS_DIR, usuario, "Biblioteca")
-    txt = os.path.join(dest_pasta, f"{jogo}.txt")
-    if os.path.exists(txt):
-        os.remove(txt)
-    for ext in (".png", ".jpg", ".jpeg", ".gif", ".ppm"):
-        p = os.path.join(dest_pasta, f"{jogo}{ext}")
-        if os.path.exists(p):
-            os.remove(p)
+    obter_armazem_usuarios().remover_jogo(usuario, jogo)
     registrar_log(f"{usuario} removeu {jogo} da biblioteca")
 
 def listar_biblioteca(usuario):
-    pasta = os.path.join(USUARIOS_DIR, usuario, "Biblioteca")
-    if not os.path.exists(pasta):
+    return obter_armazem_usuarios().listar_biblioteca(usuario)
+
+# Operações em lote: uma transação e um único registro no log por chamada
+def adicionar_jogos_a_usuario(usuario, jogos, ignorados=None):
+    usuarios, jogos = _validar_vinculos([usuario], jogos, ignorados)
+    if not usuarios:
+        return 0
+    armazem = obter_armazem_usuarios()
+    possuidos = set(armazem.listar_biblioteca(usuario))
+    novos = [j for j in dict.fromkeys(jogos) if j not in possuidos]
+    n = armazem.adicionar_jogos([(usuario, j) for j in novos])
+    registrar_log(f"{usuario} adicionou {n} jogos à biblioteca: {', '.join(novos)}")
+    return n
+
+def remover_jogos_do_usuario(usuario, jogos):
+    armazem = obter_armazem_usuarios()
+    possuidos = set(armazem.listar_biblioteca(usuario))
+    removidos = [j for j in dict.fromkeys(jogos) if j in possuidos]
+    n = armazem.remover_jogos([(usuario, j) for j in removidos])
+    registrar_log(f"{usuario} removeu {n} jogos da biblioteca: {', '.join(removidos)}")
+    return n
+
+def conceder_jogos_a_usuarios(usuarios, jogos, autor="sistema", ignorados=None):
+    usuarios, jogos = _validar_vinculos(usuarios, jogos, ignorados)
+    n = obter_armazem_usuarios().adicionar_jogos([(u, j) for u in usuarios for j in jogos])
+    registrar_log(f"{autor} concedeu {len(jogos)} jogos a {len(usuarios)} usuários ({n} novos): "
+                  f"jogos=[{', '.join(jogos)}] usuarios=[{', '.join(usuarios)}]")
+    return n
+
+# ---------- Cache de miniaturas em disco ----------
+TAMANHO_CAPA = (400, 420)  # área máxima da capa no painel de detalhes
+
+def redimensionar_capa(img, max_w, max_h):
+    # redimensiona mantendo proporção para caber no label
+    w, h = img.size
+    ratio = min(max_w / w, max_h / h, 1)
+    new_size = (max(1, int(w * ratio)), max(1, int(h * ratio)))
+    return img.resize(new_size, _opcional("PIL.Image").LANCZOS)
+
+class CacheMiniaturas:
+    # Miniaturas PNG já redimensionadas, chaveadas por (origem, mtime, tamanho).
+    # Sobrevivem a logout e reinício; o mtime do arquivo da miniatura marca o
+    # último uso e as menos usadas saem quando a pasta passa de `limite_bytes`.
+    def __init__(self, pasta=None, limite_bytes=64 * 1024 * 1024):
+        self.pasta = pasta or MINIATURAS_DIR
+        self.limite_bytes = limite_bytes
+        self._lock = threading.Lock()
+        self._total = None  # bytes em disco (calculado na 1ª escrita)
+
+    def caminho(self, origem, mtime, tamanho):
+        if not origem.startswith(PREFIXO_PACOTE):
+            origem = os.path.abspath(origem)
+        chave = f"{origem}|{mtime!r}|{tamanho[0]}x{tamanho[1]}"
+        return os.path.join(self.pasta, hashlib.sha1(chave.encode("utf-8")).hexdigest() + ".png")
+
+    def obter(self, origem, mtime, tamanho):
+        destino = self.caminho(origem, mtime, tamanho)
+        try:
+            with _opcional("PIL.Image").open(destino) as im:
+                img = im.convert("RGBA")
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(destino)  # marca uso recente para a evicção
+        except OSError:
+            pass
+        return img
+
+    def gerar(self, origem, mtime, tamanho):
+        with abrir_capa(origem) as fonte, _opcional("PIL.Image").open(fonte) as im:
+            img = redimensionar_capa(im.convert("RGBA"), *tamanho)
+        os.makedirs(self.pasta, exist_ok=True)
+        destino = self.caminho(origem, mtime, tamanho)
+        tmp = f"{destino}.{threading.get_ident()}.tmp"
+        try:
+            img.save(tmp, format="PNG")
+            os.replace(tmp, destino)
+            self._contabilizar(os.path.getsize(destino))
+        except OSError as e:
+            registrar_log(f"Não foi possível gravar miniatura de {origem}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        return img
+
+    @instrumentar("miniatura.obter_ou_gerar")
+    def obter_ou_gerar(self, origem, mtime, tamanho=TAMANHO_CAPA):
+        img = self.obter(origem, mtime, tamanho)
+        return img if img is not None else self.gerar(origem, mtime, tamanho)
+
+    def _entradas(self):
+        try:
+            return [e for e in os.scandir(self.pasta) if e.is_file() and e.name.endswith(".png")]
+        except OSError:
+            return []
+
+    def _contabilizar(self, novos_bytes):
+        with self._lock:
+            if self._total is None:
+                self._total = sum(e.stat().st_size for e in self._entradas())
+            else:
+                self._total += novos_bytes
+            if self._total <= self.limite_bytes:
+                return
+            # remove as menos usadas até ficar em 90% do limite
+            entradas = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in self._entradas()))
+            total = sum(t for _m, t, _p in entradas)
+            alvo = self.limite_bytes * 0.9
+            for _m, tam, caminho in entradas:
+                if total <= alvo:
+                    break
+                try:
+                    os.remove(caminho)
+                    total -= tam
+                except OSError:
+                    pass
+            self._total = total
+
+_miniaturas = None
+
+def obter_cache_miniaturas():
+    global _miniaturas
+    if _miniaturas is None:
+        _miniaturas = CacheMiniaturas()
+    return _miniaturas
+
+# ---------- Cache de imagens em memória (LRU) ----------
+class CacheImagensLRU:
+    # LRU limitado por número de entradas e pelos bytes estimados dos pixels
+    # decodificados (largura * altura * 4). Chave = (caminho, mtime); uma
+    # entrada nova para um caminho substitui a de mtime antigo.
+    def __init__(self, max_entradas=80, max_bytes=48 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()  # key -> (img, bytes)
+        self._por_caminho = {}       # caminho -> key atual
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def estimar_bytes(img):
+        try:
+            return int(img.width()) * int(img.height()) * 4
+        except Exception:
+            return 0
+
+    def get(self, key):
+        item = self._itens.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._itens.move_to_end(key)
+        self.hits += 1
+        return item[0]
+
+    def __contains__(self, key):
+        return key in self._itens
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _remover(self, key):
+        _img, tam = self._itens.pop(key)
+        self.bytes -= tam
+        if self._por_caminho.get(key[0]) == key:
+            del self._por_caminho[key[0]]
+
+    def put(self, key, img):
+        if key in self._itens:
+            self._remover(key)
+        antiga = self._por_caminho.get(key[0])
+        if antiga is not None:
+            self._remover(antiga)  # mesmo arquivo com mtime antigo
+        tam = self.estimar_bytes(img)
+        self._itens[key] = (img, tam)
+        self._por_caminho[key[0]] = key
+        self.bytes += tam
+        while len(self._itens) > 1 and (len(self._itens) > self.max_entradas or self.bytes > self.max_bytes):
+            self._remover(next(iter(self._itens)))
+            self.evictions += 1
+
+    def clear(self):
+        self._itens.clear()
+        self._por_caminho.clear()
+        self.bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entradas": len(self._itens), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+# ---------- Detecção de mudanças no disco (inotify / assinatura de stat) ----------
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_IGNORED = 0x8000
+_INOTIFY_MASCARA = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+_INOTIFY_EVENTO = struct.Struct("iIII")
+
+class _Inotify:
+    # inotify via ctypes (sem dependências); só existe no Linux
+    def __init__(self, pastas):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        self.wds = {}
+        try:
+            for pasta in pastas:
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(pasta), _INOTIFY_MASCARA)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"inotify_add_watch falhou: {pasta}")
+                self.wds[wd] = pasta
+        except Exception:
+            os.close(self.fd)
+            raise
+
+    def ler(self):
+        # devolve [(pasta, mask, nome)] sem bloquear
+        eventos = []
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return eventos
+            if not buf:
+                return eventos
+            pos = 0
+            while pos + _INOTIFY_EVENTO.size <= len(buf):
+                wd, mask, _cookie, tam = _INOTIFY_EVENTO.unpack_from(buf, pos)
+                pos += _INOTIFY_EVENTO.size
+                nome = buf[pos:pos + tam].rstrip(b"\0").decode("utf-8", "replace")
+                pos += tam
+                eventos.append((self.wds.get(wd), mask, nome))
+
+    def fechar(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+class MonitorDiretorios:
+    # Diz se o conteúdo (lista de entradas) de alguma das pastas mudou desde
+    # a última consulta. Usa inotify quando possível; senão compara uma
+    # assinatura barata (mtime_ns/inode de cada pasta, um stat por pasta).
+    def __init__(self, pastas):
+        self.pastas = list(pastas)
+        self._inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(self.pastas)
+            except Exception:
+                self._inotify = None
+        self._assinatura = self._calcular_assinatura()
+
+    def _calcular_assinatura(self):
+        sig = []
+        for pasta in self.pastas:
+            try:
+                st = os.stat(pasta)
+                sig.append((st.st_mtime_ns, st.st_ino))
+            except OSError:
+                sig.append(None)
+        return sig
+
+    def mudou(self):
+        # devolve o conjunto de pastas que mudaram (vazio se nada mudou)
+        if self._inotify is not None:
+            eventos = self._inotify.ler()
+            if any(mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF) for _p, mask, _n in eventos):
+                # pasta observada sumiu/foi movida: o watch morreu, volta para stat
+                self._inotify.fechar()
+                self._inotify = None
+                self._assinatura = self._calcular_assinatura()
+                return set(self.pastas)
+            return {p for p, _mask, _n in eventos if p}
+        nova = self._calcular_assinatura()
+        mudaram = {p for p, a, b in zip(self.pastas, self._assinatura, nova) if a != b}
+        self._assinatura = nova
+        return mudaram
+
+    def fechar(self):
+        if self._inotify is not None:
+            self._inotify.fechar()
+            self._inotify = None
+
+def operacoes_diff(atuais, novos):
+    # operações (i1, i2, itens) que transformam `atuais` em `novos`,
+    # em ordem decrescente para poderem ser aplicadas em sequência
+    if list(atuais) == list(novos):
         return []
-    files = os.listdir(pasta)
-    jogos = []
-    for f in files:
-        if f.endswith(".txt"):
-            nome = f[:-4]
-            if nome not in jogos:
-                jogos.append(nome)
-    return sorted(jogos)
+    sm = difflib.SequenceMatcher(a=atuais, b=novos, autojunk=False)
+    return [(i1, i2, novos[j1:j2]) for tag, i1, i2, j1, j2 in reversed(sm.get_opcodes()) if tag != "equal"]
 
 # ---------- Interface Tkinter ----------
+class ListaVirtual:
+    # Lista com a interface de leitura de um Listbox (size, get, curselection,
+    # <<ListboxSelect>>) que desenha num Canvas só as linhas visíveis. Trocar
+    # os itens é O(n) em memória e O(linhas na tela) em desenho, não importa
+    # o tamanho do catálogo. Seleção múltipla com Ctrl/Shift e navegação por
+    # teclado como no Listbox em modo EXTENDED.
+    def __init__(self, master, width=30, height=25):
+        self.frame = ttk.Frame(master)
+        fonte = tk.font.nametofont("TkDefaultFont")
+        self._fonte = fonte
+        self._altura = fonte.metrics("linespace") + 4
+        self.canvas = tk.Canvas(self.frame, width=width * fonte.measure("0"), height=height * self._altura,
+                                background="white", highlightthickness=1, takefocus=1)
+        self.barra = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.barra.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._itens = []
+        self._selecao = set()
+        self._ancora = None
+        self._ativo = None
+        self._topo = 0
+        self._com_foco = False
+        self.canvas.bind("<Configure>", lambda e: self._desenhar())
+        self.canvas.bind("<FocusIn>", lambda e: self._foco(True))
+        self.canvas.bind("<FocusOut>", lambda e: self._foco(False))
+        self.canvas.bind("<Button-1>", self._clique)
+        self.canvas.bind("<Control-Button-1>", lambda e: self._clique(e, alternar=True))
+        self.canvas.bind("<Shift-Button-1>", lambda e: self._clique(e, estender=True))
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        for tecla, passo in (("Up", -1), ("Down", 1), ("Prior", "pagina-"), ("Next", "pagina+"),
+                             ("Home", "inicio"), ("End", "fim")):
+            self.canvas.bind(f"<{tecla}>", lambda e, p=passo: self._mover(p))
+            self.canvas.bind(f"<Shift-{tecla}>", lambda e, p=passo: self._mover(p, estender=True))
+        self.canvas.bind("<Control-a>", lambda e: self._selecionar_tudo())
+
+    def pack(self, **kw):
+        self.frame.pack(**kw)
+
+    def bind(self, evento, funcao):
+        self.canvas.bind(evento, funcao, add="+")
+
+    # --- interface de Listbox usada pelo App ---
+    def size(self):
+        return len(self._itens)
+
+    def get(self, i, j=None):
+        if j is None:
+            return self._itens[i]
+        return tuple(self._itens[i:] if j == tk.END else self._itens[i:j + 1])
+
+    def curselection(self):
+        return tuple(sorted(self._selecao))
+
+    def definir_itens(self, itens):
+        # mantém a seleção pelos nomes; devolve False se nada mudou
+        itens = list(itens)
+        if itens == self._itens:
+            return False
+        selecionados = {self._itens[i] for i in self._selecao}
+        ativo = self._itens[self._ativo] if self._ativo is not None and self._ativo < len(self._itens) else None
+        self._itens = itens
+        if selecionados or ativo is not None:
+            posicoes = {nome: i for i, nome in enumerate(itens)}
+            self._selecao = {posicoes[n] for n in selecionados if n in posicoes}
+            self._ativo = posicoes.get(ativo)
+        else:
+            self._selecao = set()
+            self._ativo = None
+        self._ancora = self._ativo
+        self._topo = max(0, min(self._topo, len(itens) - self._linhas_visiveis()))
+        self._desenhar()
+        return True
+
+    def selecionar(self, idx, avisar=False):
+        self._selecao = {idx}
+        self._ativo = self._ancora = idx
+        self.ver(idx)
+        if avisar:
+            self._avisar()
+
+    def ver(self, idx):
+        visiveis = self._linhas_visiveis()
+        if idx < self._topo:
+            self._topo = idx
+        elif idx >= self._topo + visiveis:
+            self._topo = idx - visiveis + 1
+        self._desenhar()
+
+    # --- rolagem e desenho ---
+    def _linhas_visiveis(self):
+        return max(1, self.canvas.winfo_height() // self._altura)
+
+    def yview(self, *args):
+        total = len(self._itens)
+        visiveis = self._linhas_visiveis()
+        if args and args[0] == "moveto":
+            self._topo = int(float(args[1]) * total)
+        elif args and args[0] == "scroll":
+            passo = int(args[1]) * (visiveis if args[2] == "pages" else 1)
+            self._topo += passo
+        self._topo = max(0, min(self._topo, total - visiveis))
+        self._desenhar()
+
+    def _desenhar(self):
+        c = self.canvas
+        c.delete("all")
+        total = len(self._itens)
+        largura = c.winfo_width()
+        visiveis = self._linhas_visiveis()
+        fim = min(total, self._topo + visiveis + 1)
+        for i in range(self._topo, fim):
+            y = (i - self._topo) * self._altura
+            if i in self._selecao:
+                c.create_rectangle(0, y, largura, y + self._altura, fill="#3874d8", width=0)
+            if i == self._ativo and self._com_foco:
+                c.create_rectangle(1, y, largura - 2, y + self._altura - 1, outline="#888888", dash=(1, 1))
+            c.create_text(4, y + self._altura // 2, text=self._itens[i], anchor="w", font=self._fonte,
+                          fill="white" if i in self._selecao else "black")
+        if total:
+            self.barra.set(self._topo / total, min(1.0, (self._topo + visiveis) / total))
+        else:
+            self.barra.set(0, 1)
+
+    def _foco(self, com_foco):
+        self._com_foco = com_foco
+        self._desenhar()
+
+    # --- seleção ---
+    def _avisar(self):
+        self._desenhar()
+        self.canvas.event_generate("<<ListboxSelect>>")
+
+    def _clique(self, evento, alternar=False, estender=False):
+        self.canvas.focus_set()
+        idx = self._topo + evento.y // self._altura
+        if not 0 <= idx < len(self._itens):
+            return "break"
+        if estender and self._ancora is not None:
+            a, b = sorted((self._ancora, idx))
+            self._selecao = set(range(a, b + 1))
+        elif alternar:
+            self._selecao ^= {idx}
+            self._ancora = idx
+        else:
+            self._selecao = {idx}
+            self._ancora = idx
+        self._ativo = idx
+        self._avisar()
+        return "break"
+
+    def _mover(self, passo, estender=False):
+        total = len(self._itens)
+        if not total:
+            return "break"
+        atual = self._ativo if self._ativo is not None else -1
+        visiveis = self._linhas_visiveis()
+        alvo = {"pagina-": atual - visiveis, "pagina+": atual + visiveis,
+                "inicio": 0, "fim": total - 1}.get(passo, atual + passo if isinstance(passo, int) else atual)
+        alvo = max(0, min(total - 1, alvo))
+        if estender and self._ancora is not None:
+            a, b = sorted((self._ancora, alvo))
+            self._selecao = set(range(a, b + 1))
+            self._ativo = alvo
+        else:
+            self._selecao = {alvo}
+            self._ativo = self._ancora = alvo
+        self.ver(alvo)
+        self._avisar()
+        return "break"
+
+    def _selecionar_tudo(self):
+        self._selecao = set(range(len(self._itens)))
+        self._avisar()
+        return "break"
+
+class VisualizadorLog:
+    # Janela de logs: mostra as últimas PAGINA linhas, carrega páginas mais
+    # antigas ao rolar até o topo, acompanha linhas novas (tail -f) e filtra
+    # por texto sem ler o arquivo inteiro para a memória.
+    PAGINA = 500
+    SEGUIR_MS = 1000
+
+    def __init__(self, master, caminho=None):
+        self.caminho = caminho or LOG_FILE
+        self.filtro = ""
+        self.inicio = self.fim = 0
+        self._job = None
+        _registrador.flush(1)
+
+        self.top = tk.Toplevel(master)
+        self.top.title("Logs do Sistema")
+        self.top.protocol("WM_DELETE_WINDOW", self.fechar)
+        barra = ttk.Frame(self.top, padding=4)
+        barra.pack(fill=tk.X)
+        ttk.Label(barra, text="Filtro:").pack(side=tk.LEFT)
+        self.ent_filtro = ttk.Entry(barra, width=40)
+        self.ent_filtro.pack(side=tk.LEFT, padx=4)
+        self.ent_filtro.bind("<Return>", lambda e: self.aplicar_filtro())
+        ttk.Button(barra, text="Filtrar", command=self.aplicar_filtro).pack(side=tk.LEFT)
+        ttk.Button(barra, text="Limpar", command=self.limpar_filtro).pack(side=tk.LEFT, padx=4)
+        self.var_seguir = tk.BooleanVar(value=True)
+        ttk.Checkbutton(barra, text="Acompanhar", variable=self.var_seguir).pack(side=tk.RIGHT)
+
+        frame = ttk.Frame(self.top)
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.txt = tk.Text(frame, width=100, height=30, wrap=tk.NONE, yscrollcommand=self._ao_rolar)
+        self.sb = ttk.Scrollbar(frame, command=self.txt.yview)
+        self.sb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.txt.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.carregar()
+        self._job = self.top.after(self.SEGUIR_MS, self._seguir)
+
+    def _inserir(self, indice, linhas):
+        self.txt.config(state=tk.NORMAL)
+        self.txt.insert(indice, "".join(l + "\n" for l in linhas))
+        self.txt.config(state=tk.DISABLED)
+
+    def carregar(self):
+        self.txt.config(state=tk.NORMAL)
+        self.txt.delete("1.0", tk.END)
+        self.txt.config(state=tk.DISABLED)
+        try:
+            if self.filtro:
+                linhas, self.inicio, self.fim = filtrar_log(self.caminho, self.filtro, limite=self.PAGINA)
+            else:
+                linhas, self.inicio, self.fim = ler_linhas_anteriores(self.caminho, n=self.PAGINA)
+        except OSError:
+            linhas, self.inicio, self.fim = [], 0, 0
+        self._inserir(tk.END, linhas)
+        self.txt.see(tk.END)
+
+    def aplicar_filtro(self):
+        self.filtro = self.ent_filtro.get().strip()
+        self.carregar()
+
+    def limpar_filtro(self):
+        self.ent_filtro.delete(0, tk.END)
+        self.aplicar_filtro()
+
+    def _ao_rolar(self, primeiro, ultimo):
+        self.sb.set(primeiro, ultimo)
+        if float(primeiro) <= 0.0 and self.inicio > 0:
+            self.top.after_idle(self._carregar_anteriores)
+
+    def _carregar_anteriores(self):
+        if self.inicio <= 0:
+            return
+        try:
+            if self.filtro:
+                linhas, self.inicio, _ = filtrar_log(self.caminho, self.filtro, fim=self.inicio, limite=self.PAGINA)
+            else:
+                linhas, self.inicio, _ = ler_linhas_anteriores(self.caminho, fim=self.inicio, n=self.PAGINA)
+        except OSError:
+            return
+        if linhas:
+            self._inserir("1.0", linhas)
+            self.txt.yview(f"{len(linhas) + 1}.0")  # mantém a linha que estava no topo
+
+    def _seguir(self):
+        novas = ler_linhas_novas(self.caminho, self.fim)
+        if novas is None:
+            self.carregar()  # arquivo rotacionado: recomeça do novo
+        else:
+            linhas, self.fim = novas
+            if self.filtro:
+                linhas = [l for l in linhas if self.filtro in l]
+            if linhas:
+                self._inserir(tk.END, linhas)
+                if self.var_seguir.get():
+                    self.txt.see(tk.END)
+        self._job = self.top.after(self.SEGUIR_MS, self._seguir)
+
+    def fechar(self):
+        if self._job:
+            self.top.after_cancel(self._job)
+        self.top.destroy()
+
 class App:
-    REFRESH_MS = 2000  # atualiza a cada 2s
+    REFRESH_MS = 2000  # verifica mudanças no disco a cada 2s
+    PREFETCH_VIZINHOS = 3  # capas pré-carregadas acima/abaixo da seleção
 
     def __init__(self, root):
         self.root = root
         self.root.title("Gerenciador Steam - Login")
         self.usuario = None
         self.permissao = None
-        self.image_cache = {}  # cache de imagens (path->tk image)
+        self.image_cache = CacheImagensLRU()  # (path, mtime) -> tk image
+        self._imagem_pedida = None
+        self._jogo_exibido = None
+        self._pool_imagens = ThreadPoolExecutor(max_workers=3, thread_name_prefix="steam-img")
+        self._pool_login = ThreadPoolExecutor(max_workers=1, thread_name_prefix="steam-login")
+        self._pendentes = {}      # (path, mtime) -> Future de decodificação
+        self._prefetch_keys = []  # chaves pedidas pelo último prefetch
+        self.monitor = None
+        self._catalogo_total = []
+        obter_revalidador().ouvir(lambda nome: self.root.after(0, self._capa_atualizada, nome))
+        self.monitor_lag = MonitorLagTk(root)
+        self.root.protocol("WM_DELETE_WINDOW", self.fechar)
+        if os.environ.get("STEAM_MONITOR_LAG") == "1":
+            metricas.ativar()
+            self.monitor_lag.iniciar()
         self.build_login_ui()
 
     def build_login_ui(self):
@@ -325,18 +2981,36 @@ class App:
         self.ent_user.insert(0, "ryan")
         self.ent_pass = ttk.Entry(frm, show="*")
         self.ent_pass.pack(fill=tk.X, pady=5)
-        btn = ttk.Button(frm, text="Entrar", command=self.tentar_login)
-        btn.pack(pady=10)
+        self.btn_entrar = ttk.Button(frm, text="Entrar", command=self.tentar_login)
+        self.btn_entrar.pack(pady=10)
+        self.ent_pass.bind("<Return>", lambda e: self.tentar_login())
 
     def tentar_login(self):
+        if str(self.btn_entrar["state"]) == tk.DISABLED:
+            return  # verificação anterior ainda em andamento
         user = self.ent_user.get().strip().lower()
         pwd = self.ent_pass.get().strip()
-        perm = validar_login(user, pwd)
+        # o hash da senha leva dezenas de ms: roda fora da thread do Tk
+        self.btn_entrar.config(state=tk.DISABLED, text="Verificando...")
+        fut = self._pool_login.submit(autenticar, user, pwd, "gui")
+        fut.add_done_callback(lambda f: self.root.after(0, self._login_concluido, user, f))
+
+    def _login_concluido(self, user, fut):
+        if not self.btn_entrar.winfo_exists():
+            return
+        self.btn_entrar.config(state=tk.NORMAL, text="Entrar")
+        try:
+            perm, espera = fut.result()
+        except Exception as e:
+            messagebox.showerror("Erro", f"Falha ao verificar login: {e}")
+            return
         if perm:
             self.usuario = user
             self.permissao = perm
             registrar_log(f"{user} entrou via GUI")
             self.build_main_ui()
+        elif espera:
+            messagebox.showerror("Erro", f"Muitas tentativas. Tente novamente em {espera:.0f}s")
         else:
             messagebox.showerror("Erro", "Usuário ou senha inválidos")
 
@@ -351,7 +3025,15 @@ class App:
         left = ttk.Frame(container)
         left.pack(side=tk.LEFT, fill=tk.Y, padx=6)
         ttk.Label(left, text="Jogos (Empresa)", font=("TkDefaultFont", 12)).pack()
-        self.lb_jogos = tk.Listbox(left, width=30, height=25)
+        self.var_busca = tk.StringVar()
+        ent_busca = ttk.Entry(left, textvariable=self.var_busca)
+        ent_busca.pack(fill=tk.X, pady=(2, 4))
+        self.var_busca.trace_add("write", lambda *_: self.aplicar_busca())
+        ent_busca.bind("<Down>", lambda e: self.lb_jogos.canvas.focus_set())
+        ent_busca.bind("<Return>", lambda e: self.lb_jogos.size() and self.lb_jogos.selecionar(0, avisar=True))
+        self.lbl_contagem = ttk.Label(left)
+        self.lbl_contagem.pack(anchor="w")
+        self.lb_jogos = ListaVirtual(left, width=30, height=25)
         self.lb_jogos.pack(fill=tk.Y, expand=True)
         self.lb_jogos.bind("<<ListboxSelect>>", self.on_jogo_select)
 
@@ -371,7 +3053,7 @@ class App:
         right = ttk.Frame(container)
         right.pack(side=tk.LEFT, fill=tk.Y, padx=6)
         ttk.Label(right, text="Minha Biblioteca", font=("TkDefaultFont", 12)).pack()
-        self.lb_bib = tk.Listbox(right, width=30, height=25)
+        self.lb_bib = tk.Listbox(right, width=30, height=25, selectmode=tk.EXTENDED, exportselection=False)
         self.lb_bib.pack(fill=tk.Y, expand=True)
         self.lb_bib.bind("<<ListboxSelect>>", self.on_bib_select)
 
@@ -380,121 +3062,257 @@ class App:
         if self.permissao == "ADMIN":
             admin_menu = tk.Menu(menubar, tearoff=0)
             admin_menu.add_command(label="Criar usuário", command=self.ui_criar_usuario)
+            admin_menu.add_command(label="Listar usuários", command=self.ui_listar_usuarios)
+            admin_menu.add_command(label="Conceder jogos a usuários", command=self.ui_conceder_jogos)
             admin_menu.add_command(label="Ver logs", command=self.ui_ver_logs)
+            admin_menu.add_command(label="Estatísticas", command=self.ui_estatisticas)
             admin_menu.add_command(label="Relatórios", command=self.ui_ver_relatorios)
+            admin_menu.add_command(label="Desempenho", command=self.ui_desempenho)
             menubar.add_cascade(label="Admin", menu=admin_menu)
         menubar.add_command(label="Atualizar", command=self.refresh_all)
         menubar.add_command(label="Logout", command=self.logout)
         self.root.config(menu=menubar)
 
+        if self.monitor:
+            self.monitor.fechar()
+        self.monitor = MonitorDiretorios([JOGOS_DIR])
+        self._versao_dados = obter_armazem_usuarios().versao_dados()
         self.refresh_all()
-        self.root.after(self.REFRESH_MS, self.periodic_refresh)
+        self._refresh_job = self.root.after(self.REFRESH_MS, self.periodic_refresh)
 
     def periodic_refresh(self):
-        # atualiza lista e tenta carregar nova imagem se houver mudanças
-        self.refresh_all()
-        self.root.after(self.REFRESH_MS, self.periodic_refresh)
+        # só relista quando a pasta de jogos ou o banco (bibliotecas) realmente mudou
+        versao = obter_armazem_usuarios().versao_dados()
+        mudou_banco = versao != self._versao_dados
+        self._versao_dados = versao
+        if (self.monitor and self.monitor.mudou()) or mudou_banco:
+            self.refresh_all()
+        self._refresh_job = self.root.after(self.REFRESH_MS, self.periodic_refresh)
 
+    def sincronizar_listbox(self, lb, itens):
+        if isinstance(lb, ListaVirtual):
+            return lb.definir_itens(itens)
+        # aplica só as linhas que mudaram (mantém seleção e rolagem)
+        ops = operacoes_diff(lb.get(0, tk.END), itens)
+        for i1, i2, novos in ops:
+            if i2 > i1:
+                lb.delete(i1, i2 - 1)
+            if novos:
+                lb.insert(i1, *novos)
+        return bool(ops)
+
+    @instrumentar("refresh_all")
     def refresh_all(self):
-        jogos = listar_jogos_empresa()
-        self.lb_jogos.delete(0, tk.END)
-        for j in jogos:
-            self.lb_jogos.insert(tk.END, j)
-        bib = listar_biblioteca(self.usuario)
-        self.lb_bib.delete(0, tk.END)
-        for b in bib:
-            self.lb_bib.insert(tk.END, b)
+        self._catalogo_total = listar_jogos_empresa()
+        obter_catalogo().indice_busca_async()  # deixa o índice pronto antes da 1ª tecla
+        self.aplicar_busca()
+        self.sincronizar_listbox(self.lb_bib, listar_biblioteca(self.usuario))
 
         cur = self.get_selected_listbox_item(self.lb_jogos)
         if cur:
             self.show_jogo_image(cur)
 
+    def aplicar_busca(self):
+        # o índice é montado em background; enquanto o novo não fica pronto,
+        # usa o anterior (filtrado pelo catálogo atual) ou mostra a lista toda
+        consulta = self.var_busca.get()
+        total = len(self._catalogo_total)
+        itens = self._catalogo_total
+        if consulta.strip():
+            catalogo = obter_catalogo()
+            indice = catalogo.indice_busca_async(self._indice_busca_pronto)
+            if indice is None:
+                self.sincronizar_listbox(self.lb_jogos, itens)
+                self.lbl_contagem.config(text=f"Indexando {total} jogos...")
+                return
+            itens = indice.buscar(consulta)
+            if indice.itens_origem is not catalogo.nomes():
+                atuais = set(self._catalogo_total)
+                itens = [i for i in itens if i in atuais]
+        self.sincronizar_listbox(self.lb_jogos, itens)
+        self.lbl_contagem.config(text=f"{len(itens)} de {total} jogos" if len(itens) != total else f"{total} jogos")
+
+    def _indice_busca_pronto(self, indice):
+        # thread do índice -> thread do Tk
+        self.root.after(0, self._reaplicar_busca)
+
+    def _reaplicar_busca(self):
+        if self.usuario and self.var_busca.get().strip():
+            self.aplicar_busca()
+
     def get_selected_listbox_item(self, lb):
         sel = lb.curselection()
         if not sel:
             return None
         return lb.get(sel[0])
 
+    def get_selected_listbox_items(self, lb):
+        return [lb.get(i) for i in lb.curselection()]
+
     def on_jogo_select(self, evt):
         jogo = self.get_selected_listbox_item(self.lb_jogos)
         if jogo:
             self.show_jogo_image(jogo)
+            self.prefetch_vizinhos(self.lb_jogos, self.lb_jogos.curselection()[0])
+
+    def prefetch_vizinhos(self, lb, idx):
+        # cancela o prefetch anterior que ainda não começou (seleção pulou)
+        for key in self._prefetch_keys:
+            fut = self._pendentes.get(key)
+            if fut is not None and key != self._imagem_pedida and fut.cancel():
+                self._pendentes.pop(key, None)
+        self._prefetch_keys = []
+        if not _opcional("PIL.Image"):
+            return
+        catalogo = obter_catalogo()
+        total = lb.size()
+        # mais próximos primeiro: idx+1, idx-1, idx+2, idx-2...
+        for dist in range(1, self.PREFETCH_VIZINHOS + 1):
+            for j in (idx + dist, idx - dist):
+                if not 0 <= j < total:
+                    continue
+                entrada = catalogo.obter(lb.get(j))
+                if entrada is None or entrada.imagem is None:
+                    continue
+                key = (entrada.imagem, entrada.mtime)
+                if key not in self.image_cache:
+                    self._decodificar(key)
+                    self._prefetch_keys.append(key)
 
     def on_bib_select(self, evt):
         jogo = self.get_selected_listbox_item(self.lb_bib)
         if jogo:
-            pasta = os.path.join(USUARIOS_DIR, self.usuario, "Biblioteca")
-            img = None
-            for ext in (".png", ".jpg", ".jpeg", ".gif", ".ppm"):
-                p = os.path.join(pasta, f"{jogo}{ext}")
-                if os.path.exists(p):
-                    img = p
-                    break
-            if img:
-                self.load_and_show_image(img)
-            else:
-                self.canvas.config(image="", text=f"{jogo}\n(sem imagem)")
+            # a biblioteca só guarda referências: a capa vem do catálogo
+            self.show_jogo_image(jogo)
 
     def show_jogo_image(self, jogo):
-        img = obter_imagem_jogo(jogo)
-        if img:
-            self.load_and_show_image(img)
+        self._jogo_exibido = jogo
+        catalogo = obter_catalogo()
+        entrada = catalogo.obter(jogo)
+        if entrada is None or entrada.imagem is None:
+            entrada = catalogo.atualizar(jogo)
+        if entrada and entrada.imagem:
+            self.load_and_show_image(entrada.imagem, entrada.mtime)
         else:
             # se não existir imagem ainda, tenta disparar download em background
-            # recupera appid da lista GAMES
-            appid = None
-            for name, aid in GAMES:
-                if safe_name(name) == jogo:
-                    appid = aid
-                    break
-            if appid and requests:
-                # dispara download rápido em thread
-                threading.Thread(target=download_and_prepare_image, args=(jogo, appid), daemon=True).start()
-            self.canvas.config(image="", text=f"{jogo}\n(sem imagem)")
+            appid = entrada.appid if entrada else None
+            texto = f"{jogo}\n(sem imagem)"
+            if appid and _opcional("requests"):
+                motor = obter_motor_downloads()
+                if motor.em_falha_recente(appid):
+                    texto = f"{jogo}\n(capa indisponível — nova tentativa mais tarde)"
+                else:
+                    # download sob demanda pelo mesmo pool da carga inicial;
+                    # ao terminar, mostra a capa se o jogo ainda estiver selecionado
+                    motor.submit(jogo, appid,
+                                 callback=lambda c: self.root.after(0, self._download_concluido, jogo, c))
+            self._imagem_pedida = None
+            self.canvas.config(image="", text=texto)
 
-    def load_and_show_image(self, path):
+    def _capa_atualizada(self, jogo):
+        # revalidação trocou a capa: o índice já tem o mtime novo
+        if self.usuario and self._jogo_exibido == jogo:
+            self.show_jogo_image(jogo)
+
+    def _download_concluido(self, jogo, caminho):
+        if caminho and self.usuario and self._jogo_exibido == jogo:
+            self.load_and_show_image(caminho)
+
+    @instrumentar("load_and_show_image")
+    def load_and_show_image(self, path, mtime=None):
         try:
-            mtime = os.path.getmtime(path)
+            if mtime is None:
+                mtime = mtime_capa(path)
             key = (path, mtime)
-            if key not in self.image_cache:
-                if PIL_AVAILABLE:
-                    img = Image.open(path)
-                    # redimensiona mantendo proporção para caber no label
-                    w, h = img.size
-                    max_w, max_h = 400, 420
-                    ratio = min(max_w / w, max_h / h, 1)
-                    new_size = (int(w * ratio), int(h * ratio))
-                    img = img.resize(new_size, Image.LANCZOS)
-                    tkimg = ImageTk.PhotoImage(img)
+            self._imagem_pedida = key
+            tkimg = self.image_cache.get(key)
+            if tkimg is None:
+                if _opcional("PIL.Image"):
+                    # decodifica/redimensiona fora da thread do Tk (ou lê a miniatura pronta do disco)
+                    self.canvas.config(image="", text=f"{os.path.basename(path)}\n(carregando...)")
+                    self._decodificar(key)
+                    return
+                # PhotoImage suporta PNG/GIF nativamente; JPEG pode falhar em alguns builds de Tk
+                if path.startswith(PREFIXO_PACOTE):
+                    with abrir_capa(path) as fonte:
+                        tkimg = tk.PhotoImage(data=base64.b64encode(fonte.read()))
                 else:
-                    # PhotoImage suporta PNG/GIF nativamente; JPEG pode falhar em alguns builds de Tk
                     tkimg = tk.PhotoImage(file=path)
-                self.image_cache = { } if len(self.image_cache) > 80 else self.image_cache
-                self.image_cache[key] = tkimg
-            tkimg = self.image_cache[key]
-            self.canvas.config(image=tkimg, text="")
-            self.canvas.image = tkimg
+                self.image_cache.put(key, tkimg)
+            self._mostrar_imagem(tkimg)
+        except Exception as e:
+            self._erro_imagem(path, e)
+
+    def _decodificar(self, key):
+        # um único Future por (path, mtime), compartilhado entre exibição e prefetch
+        fut = self._pendentes.get(key)
+        if fut is None:
+            fut = self._pool_imagens.submit(obter_cache_miniaturas().obter_ou_gerar, key[0], key[1], TAMANHO_CAPA)
+            self._pendentes[key] = fut
+            fut.add_done_callback(lambda f: self.root.after(0, self._miniatura_pronta, key, f))
+        return fut
+
+    @instrumentar("tk.miniatura_pronta")
+    def _miniatura_pronta(self, key, fut):
+        if self._pendentes.get(key) is fut:
+            del self._pendentes[key]
+        if not self.usuario or fut.cancelled():
+            return
+        if key != self._imagem_pedida and key not in self._prefetch_keys:
+            return  # prefetch obsoleto: a miniatura já ficou no disco, não vale criar a PhotoImage
+        try:
+            tkimg = _opcional("PIL.ImageTk").PhotoImage(fut.result())
         except Exception as e:
-            self.canvas.config(image="", text=f"Erro carregando imagem\n{os.path.basename(path)}")
-            registrar_log(f"Erro load image {path}: {e}")
+            if self._imagem_pedida == key:
+                self._erro_imagem(key[0], e)
+            return
+        self.image_cache.put(key, tkimg)
+        if self._imagem_pedida == key:
+            self._mostrar_imagem(tkimg)
+
+    def _mostrar_imagem(self, tkimg):
+        self.canvas.config(image=tkimg, text="")
+        self.canvas.image = tkimg
+
+    def _erro_imagem(self, path, e):
+        self.canvas.config(image="", text=f"Erro carregando imagem\n{os.path.basename(path)}")
+        registrar_log(f"Erro load image {path}: {e}")
+        # capa pode ter sido apagada/trocada por fora: re-resolve no índice
+        if path.startswith(PREFIXO_PACOTE):
+            nome = path[len(PREFIXO_PACOTE):]
+        else:
+            nome = os.path.basename(os.path.dirname(path))
+        obter_catalogo().atualizar(nome)
 
     def ui_adicionar_jogo(self):
-        jogo = self.get_selected_listbox_item(self.lb_jogos)
-        if not jogo:
+        jogos = self.get_selected_listbox_items(self.lb_jogos)
+        if not jogos:
             messagebox.showinfo("Info", "Selecione um jogo da lista da empresa.")
             return
-        adicionar_jogo_a_usuario(self.usuario, jogo)
+        if len(jogos) == 1:
+            if adicionar_jogo_a_usuario(self.usuario, jogos[0]):
+                msg = f"{jogos[0]} adicionado à sua biblioteca."
+            else:
+                msg = f"{jogos[0]} não está mais no catálogo."
+        else:
+            n = adicionar_jogos_a_usuario(self.usuario, jogos)
+            msg = f"{n} jogos adicionados à sua biblioteca."
         self.refresh_all()
-        messagebox.showinfo("OK", f"{jogo} adicionado à sua biblioteca.")
+        messagebox.showinfo("OK", msg)
 
     def ui_remover_jogo(self):
-        jogo = self.get_selected_listbox_item(self.lb_bib)
-        if not jogo:
+        jogos = self.get_selected_listbox_items(self.lb_bib)
+        if not jogos:
             messagebox.showinfo("Info", "Selecione um jogo da sua biblioteca para remover.")
             return
-        remover_jogo_do_usuario(self.usuario, jogo)
+        if len(jogos) == 1:
+            remover_jogo_do_usuario(self.usuario, jogos[0])
+            msg = f"{jogos[0]} removido da sua biblioteca."
+        else:
+            n = remover_jogos_do_usuario(self.usuario, jogos)
+            msg = f"{n} jogos removidos da sua biblioteca."
         self.refresh_all()
-        messagebox.showinfo("OK", f"{jogo} removido da sua biblioteca.")
+        messagebox.showinfo("OK", msg)
 
     # ---------- Admin UIs ----------
     def ui_criar_usuario(self):
@@ -514,29 +3332,152 @@ class App:
         else:
             messagebox.showwarning("Aviso", "Usuário já existe.")
 
+    def ui_listar_usuarios(self):
+        top = tk.Toplevel(self.root)
+        top.title(f"Usuários ({obter_armazem_usuarios().contar()})")
+        ent = ttk.Entry(top)
+        ent.pack(fill=tk.X, padx=6, pady=6)
+        lb = tk.Listbox(top, width=50, height=20)
+        lb.pack(fill=tk.BOTH, expand=True)
+        def buscar(evt=None):
+            lb.delete(0, tk.END)
+            for nome, perm in listar_usuarios(ent.get().strip().lower(), limite=1000):
+                lb.insert(tk.END, f"{nome} ({perm})")
+        ent.bind("<KeyRelease>", buscar)
+        buscar()
+
+    def ui_conceder_jogos(self):
+        top = tk.Toplevel(self.root)
+        top.title("Conceder jogos a usuários")
+        colunas = ttk.Frame(top, padding=6)
+        colunas.pack(fill=tk.BOTH, expand=True)
+
+        col_jogos = ttk.Frame(colunas)
+        col_jogos.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=4)
+        ttk.Label(col_jogos, text="Jogos").pack()
+        lb_j = tk.Listbox(col_jogos, width=35, height=20, selectmode=tk.EXTENDED, exportselection=False)
+        lb_j.pack(fill=tk.BOTH, expand=True)
+        for j in listar_jogos_empresa():
+            lb_j.insert(tk.END, j)
+
+        col_users = ttk.Frame(colunas)
+        col_users.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=4)
+        ttk.Label(col_users, text="Usuários").pack()
+        ent = ttk.Entry(col_users)
+        ent.pack(fill=tk.X)
+        lb_u = tk.Listbox(col_users, width=35, height=19, selectmode=tk.EXTENDED, exportselection=False)
+        lb_u.pack(fill=tk.BOTH, expand=True)
+        def buscar(evt=None):
+            lb_u.delete(0, tk.END)
+            for nome, _perm in listar_usuarios(ent.get().strip().lower(), limite=1000):
+                lb_u.insert(tk.END, nome)
+        ent.bind("<KeyRelease>", buscar)
+        buscar()
+
+        def aplicar():
+            jogos = self.get_selected_listbox_items(lb_j)
+            usuarios = self.get_selected_listbox_items(lb_u)
+            if not jogos or not usuarios:
+                messagebox.showinfo("Info", "Selecione ao menos um jogo e um usuário.", parent=top)
+                return
+            n = conceder_jogos_a_usuarios(usuarios, jogos, autor=self.usuario)
+            if self.usuario in usuarios:
+                self.refresh_all()
+            messagebox.showinfo("OK", f"{len(jogos)} jogos aplicados a {len(usuarios)} usuários ({n} novos).", parent=top)
+        ttk.Button(top, text="Aplicar", command=aplicar).pack(pady=6)
+
     def ui_ver_logs(self):
         if not os.path.exists(LOG_FILE):
             messagebox.showinfo("Logs", "Sem logs ainda.")
             return
+        VisualizadorLog(self.root)
+
+    def ui_estatisticas(self):
         top = tk.Toplevel(self.root)
-        top.title("Logs do Sistema")
-        txt = tk.Text(top, width=100, height=30)
+        top.title("Estatísticas do log")
+        txt = tk.Text(top, width=90, height=32)
         txt.pack(fill=tk.BOTH, expand=True)
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            txt.insert("1.0", f.read())
+        txt.insert("1.0", "Analisando log...")
         txt.config(state=tk.DISABLED)
+        def mostrar(r):
+            if not top.winfo_exists():
+                return
+            linhas = [f"Linhas analisadas: {r['linhas']}",
+                      f"Logins: {r['logins']}  Falhas: {r['falhas']}  Taxa de falha: {r['taxa_falha']:.1%}",
+                      f"Downloads: {r['downloads_ok']} ok, {r['downloads_erros']} erros {r['erros_por_tipo']}",
+                      "", "Usuários com mais falhas:"]
+            piores = sorted(r["usuarios"].items(), key=lambda kv: -kv[1]["falhas"])[:10]
+            linhas += [f"  {u}: {a['falhas']} falhas / {a['ok']} logins (taxa {r['taxa_falha_por_usuario'].get(u, 0):.1%})"
+                       for u, a in piores if a["falhas"]]
+            linhas += ["", "Jogos mais adicionados:"] + [f"  {j}: {n}" for j, n in r["jogos_mais_adicionados"]]
+            linhas += ["", "Jogos com mais erros de download:"] + [f"  {j}: {n}" for j, n in r["jogos_com_mais_erros"]]
+            horas = r["logins_por_hora"]
+            linhas += ["", "Logins por hora (últimas 24 com atividade):"]
+            linhas += [f"  {h}h: " + ", ".join(f"{u}={n}" for u, n in sorted(horas[h].items())) for h in sorted(horas)[-24:]]
+            txt.config(state=tk.NORMAL)
+            txt.delete("1.0", tk.END)
+            txt.insert("1.0", "\n".join(linhas))
+            txt.config(state=tk.DISABLED)
+        # a primeira análise de um log grande pode demorar: roda fora da thread do Tk
+        threading.Thread(target=lambda: self.root.after(0, mostrar, obter_analise_log().resumo()), daemon=True).start()
+
+    def ui_desempenho(self):
+        top = tk.Toplevel(self.root)
+        top.title("Desempenho")
+        barra = ttk.Frame(top, padding=4)
+        barra.pack(fill=tk.X)
+        var_ativo = tk.BooleanVar(value=metricas.ativo)
+        var_lag = tk.BooleanVar(value=self.monitor_lag._job is not None)
+        def alternar():
+            metricas.ativar(var_ativo.get())
+        def alternar_lag():
+            if var_lag.get():
+                var_ativo.set(True)
+                metricas.ativar()
+                self.monitor_lag.iniciar()
+            else:
+                self.monitor_lag.parar()
+        def salvar():
+            messagebox.showinfo("Desempenho", f"Salvo em {metricas.despejar()}", parent=top)
+        ttk.Checkbutton(barra, text="Coletar métricas", variable=var_ativo, command=alternar).pack(side=tk.LEFT)
+        ttk.Checkbutton(barra, text="Monitor de lag do Tk", variable=var_lag, command=alternar_lag).pack(side=tk.LEFT, padx=6)
+        ttk.Button(barra, text="Zerar", command=metricas.zerar).pack(side=tk.RIGHT)
+        ttk.Button(barra, text="Salvar agora", command=salvar).pack(side=tk.RIGHT, padx=4)
+
+        colunas = ("n", "media_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+        tabela = ttk.Treeview(top, columns=colunas, height=14)
+        tabela.heading("#0", text="métrica")
+        tabela.column("#0", width=220)
+        for c in colunas:
+            tabela.heading(c, text=c)
+            tabela.column(c, width=80, anchor=tk.E)
+        tabela.pack(fill=tk.BOTH, expand=True)
+        rodape = ttk.Label(top, padding=4)
+        rodape.pack(fill=tk.X)
+
+        def atualizar():
+            if not top.winfo_exists():
+                return
+            r = metricas.resumo()
+            tabela.delete(*tabela.get_children())
+            for nome, t in sorted(r["tempos"].items()):
+                tabela.insert("", tk.END, text=nome, values=[t[c] for c in colunas])
+            extras = dict(r["contadores"], cache_imagens=self.image_cache.stats())
+            rodape.config(text=", ".join(f"{k}: {v}" for k, v in extras.items()))
+            top.after(1000, atualizar)
+        atualizar()
 
     def ui_ver_relatorios(self):
-        arquivos = sorted(os.listdir(DOCS_DIR)) if os.path.exists(DOCS_DIR) else []
-        if not arquivos:
-            messagebox.showinfo("Relatórios", "Nenhum relatório encontrado.")
-            return
         top = tk.Toplevel(self.root)
         top.title("Relatórios")
         lb = tk.Listbox(top, width=80, height=20)
         lb.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        for a in arquivos:
-            lb.insert(tk.END, a)
+        def listar():
+            lb.delete(0, tk.END)
+            arquivos = sorted(os.listdir(DOCS_DIR)) if os.path.exists(DOCS_DIR) else []
+            for a in arquivos:
+                if a.endswith((".pdf", ".txt")):
+                    lb.insert(tk.END, a)
         def abrir():
             sel = lb.curselection()
             if not sel:
@@ -550,21 +3491,402 @@ class App:
                     os.system(f'xdg-open "{caminho}"')
                 except:
                     messagebox.showinfo("Abrir", f"Caminho: {caminho}")
+        def gerar():
+            btn_gerar.config(state=tk.DISABLED, text="Gerando...")
+            def fim(gerados):
+                if not top.winfo_exists():
+                    return
+                btn_gerar.config(state=tk.NORMAL, text="Atualizar relatórios")
+                listar()
+                msg = f"Atualizados: {', '.join(gerados)}" if gerados else "Relatórios já estavam atualizados."
+                messagebox.showinfo("Relatórios", msg, parent=top)
+            def trabalho():
+                try:
+                    gerados = criar_relatorios_pdf()
+                except Exception as e:
+                    registrar_log(f"Erro gerando relatórios: {e}")
+                    gerados = []
+                self.root.after(0, fim, gerados)
+            threading.Thread(target=trabalho, daemon=True).start()
         btn = ttk.Button(top, text="Abrir", command=abrir)
-        btn.pack(side=tk.RIGHT, padx=6, pady=6)
+        btn.pack(side=tk.TOP, padx=6, pady=6)
+        btn_gerar = ttk.Button(top, text="Atualizar relatórios", command=gerar)
+        btn_gerar.pack(side=tk.TOP, padx=6, pady=6)
+        listar()
 
     def logout(self):
         registrar_log(f"{self.usuario} fez logout")
+        self.root.after_cancel(self._refresh_job)
+        if self.monitor:
+            self.monitor.fechar()
+            self.monitor = None
         self.usuario = None
         self.permissao = None
+        registrar_log(f"Cache de imagens na sessão: {self.image_cache.stats()}")
         self.image_cache.clear()
         self.root.title("Gerenciador Steam - Login")
         self.build_login_ui()
 
+    def encerrar(self):
+        # cancela decodificações, verificações de login e downloads pendentes
+        self._pool_imagens.shutdown(wait=False, cancel_futures=True)
+        self._pool_login.shutdown(wait=False, cancel_futures=True)
+        encerrar_downloads()
+        if self.monitor:
+            self.monitor.fechar()
+            self.monitor = None
+
+    def fechar(self):
+        self.encerrar()
+        self.root.destroy()
+
+# ---------- Modo headless: API HTTP local ----------
+class RequisicaoInvalida(ValueError):
+    pass
+
+def _lista_de_textos(dados, chave):
+    valor = dados.get(chave, [])
+    if not isinstance(valor, list) or not all(isinstance(v, str) for v in valor):
+        raise RequisicaoInvalida(f"'{chave}' deve ser uma lista de textos")
+    return valor
+
+def _texto(dados, chave):
+    valor = dados.get(chave)
+    if not isinstance(valor, str) or not valor.strip():
+        raise RequisicaoInvalida(f"'{chave}' é obrigatório e deve ser texto")
+    return valor
+
+class _RotasAPI:
+    # Rotas da API; misturada com BaseHTTPRequestHandler em servir_api() para
+    # que http.server só seja importado quando o serviço for usado.
+    # API JSON mínima para provisionamento em servidores sem display.
+    #   GET  /jogos?busca=  /usuarios?prefixo=&limite=  /biblioteca/<usuario>  /estatisticas
+    #   POST /usuarios {"nome","senha","permissao"}
+    #   POST /login {"nome","senha"} -> 200 | 401 | 429 (Retry-After), limitado por usuário e IP
+    #   POST|DELETE /biblioteca/<usuario> {"jogos": [...]}
+    #   POST /conceder {"usuarios": [...], "jogos": [...]}
+    #   POST /sync-imagens  /revalidar-imagens
+    # Fora GET /jogos e POST /login, toda rota exige admin: "Authorization:
+    # Bearer <token>" (--token / STEAM_API_TOKEN) ou Basic com um usuário ADMIN.
+    server_version = "SteamEmpresa/1.0"
+    token = None  # definido em servir_api()
+
+    def _negar_sem_admin(self):
+        # True (e já respondeu 401/403/429) se a requisição não é de um admin
+        cabecalho = self.headers.get("Authorization", "")
+        esquema, _, credencial = cabecalho.partition(" ")
+        if esquema.lower() == "bearer" and self.token:
+            if hmac.compare_digest(credencial.strip().encode("utf-8"), self.token.encode("utf-8")):
+                return False
+        elif esquema.lower() == "basic":
+            try:
+                nome, _, senha = base64.b64decode(credencial.strip()).decode("utf-8").partition(":")
+            except ValueError:
+                nome = senha = ""
+            perm, espera = autenticar(nome.strip().lower(), senha, origem=self.client_address[0])
+            if perm == "ADMIN":
+                return False
+            if espera:
+                self._responder(429, {"erro": "muitas tentativas", "espera_s": round(espera, 1)},
+                                {"Retry-After": str(max(1, int(espera + 0.999)))})
+                return True
+            if perm:
+                self._responder(403, {"erro": "requer permissão ADMIN"})
+                return True
+        self._responder(401, {"erro": "autenticação necessária"}, {"WWW-Authenticate": 'Basic realm="SteamEmpresa"'})
+        return True
+
+    def _responder(self, status, dados, cabecalhos=None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _corpo(self):
+        # corpo JSON obrigatoriamente um objeto
+        try:
+            tam = int(self.headers.get("Content-Length") or 0)
+            dados = json.loads(self.rfile.read(tam) or b"{}") if tam > 0 else {}
+        except ValueError:
+            raise RequisicaoInvalida("JSON inválido")
+        if not isinstance(dados, dict):
+            raise RequisicaoInvalida("o corpo deve ser um objeto JSON")
+        return dados
+
+    def _tratar(self, rota):
+        # nenhuma exceção derruba a conexão sem resposta
+        try:
+            rota()
+        except RequisicaoInvalida as e:
+            self._responder(400, {"erro": str(e)})
+        except Exception as e:
+            registrar_log(f"API erro em {self.command} {self.path}: {e!r}")
+            self._responder(500, {"erro": "erro interno"})
+
+    def do_GET(self):
+        self._tratar(self._get)
+
+    def do_POST(self):
+        self._tratar(self._post)
+
+    def do_DELETE(self):
+        self._tratar(self._delete)
+
+    def _rota(self):
+        url = urllib.parse.urlsplit(self.path)
+        partes = [urllib.parse.unquote(p) for p in url.path.strip("/").split("/") if p]
+        return partes, urllib.parse.parse_qs(url.query)
+
+    def _get(self):
+        partes, query = self._rota()
+        if partes == ["jogos"]:
+            consulta = query.get("busca", [""])[0]
+            return self._responder(200, buscar_jogos(consulta) if consulta else listar_jogos_empresa())
+        if self._negar_sem_admin():
+            return
+        if partes == ["usuarios"]:
+            try:
+                limite = int(query.get("limite", ["1000"])[0])
+            except ValueError:
+                raise RequisicaoInvalida("'limite' deve ser um inteiro")
+            if limite < 1:
+                raise RequisicaoInvalida("'limite' deve ser maior que zero")
+            usuarios = listar_usuarios(query.get("prefixo", [""])[0], limite)
+            return self._responder(200, [{"nome": n, "permissao": p} for n, p in usuarios])
+        if len(partes) == 2 and partes[0] == "biblioteca":
+            return self._responder(200, listar_biblioteca(partes[1]))
+        if partes == ["estatisticas"]:
+            return self._responder(200, obter_analise_log().resumo())
+        self._responder(404, {"erro": "rota desconhecida"})
+
+    def _post(self):
+        partes, _query = self._rota()
+        if partes != ["login"] and self._negar_sem_admin():
+            return
+        dados = self._corpo()
+        if partes == ["usuarios"]:
+            permissao = dados.get("permissao", "USUARIO")
+            if not isinstance(permissao, str) or permissao.upper() not in ("USUARIO", "ADMIN"):
+                raise RequisicaoInvalida("'permissao' deve ser USUARIO ou ADMIN")
+            criado = criar_usuario(_texto(dados, "nome").strip().lower(), _texto(dados, "senha"), permissao.upper())
+            return self._responder(201 if criado else 409, {"criado": criado})
+        if partes == ["login"]:
+            perm, espera = autenticar(_texto(dados, "nome").strip().lower(), _texto(dados, "senha"),
+                                      origem=self.client_address[0])
+            if perm:
+                return self._responder(200, {"permissao": perm})
+            if espera:
+                return self._responder(429, {"erro": "muitas tentativas", "espera_s": round(espera, 1)},
+                                       {"Retry-After": str(max(1, int(espera + 0.999)))})
+            return self._responder(401, {"erro": "usuário ou senha inválidos"})
+        if len(partes) == 2 and partes[0] == "biblioteca":
+            ignorados = {}
+            n = adicionar_jogos_a_usuario(partes[1], _lista_de_textos(dados, "jogos"), ignorados=ignorados)
+            if ignorados["usuarios"]:
+                return self._responder(404, {"erro": "usuário inexistente"})
+            return self._responder(200, {"adicionados": n, "ignorados": ignorados["jogos"]})
+        if partes == ["conceder"]:
+            ignorados = {}
+            n = conceder_jogos_a_usuarios(_lista_de_textos(dados, "usuarios"), _lista_de_textos(dados, "jogos"),
+                                          autor="api", ignorados=ignorados)
+            return self._responder(200, {"novos": n, "ignorados": ignorados})
+        if partes == ["sync-imagens"]:
+            return self._responder(202, {"agendados": sincronizar_imagens(esperar=False)})
+        if partes == ["revalidar-imagens"]:
+            threading.Thread(target=obter_revalidador().executar, kwargs={"forcar": True}, daemon=True).start()
+            return self._responder(202, {"status": "agendada"})
+        self._responder(404, {"erro": "rota desconhecida"})
+
+    def _delete(self):
+        partes, _query = self._rota()
+        if self._negar_sem_admin():
+            return
+        if len(partes) == 2 and partes[0] == "biblioteca":
+            jogos = _lista_de_textos(self._corpo(), "jogos")
+            return self._responder(200, {"removidos": remover_jogos_do_usuario(partes[1], jogos)})
+        self._responder(404, {"erro": "rota desconhecida"})
+
+    def log_message(self, fmt, *args):
+        registrar_log(f"API {self.address_string()} {fmt % args}")
+
+def _host_local(host):
+    if host == "localhost":
+        return True
+    import ipaddress
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def servir_api(host="127.0.0.1", porta=8765, token=None):
+    # fora do loopback só sobe com token configurado
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    token = token or os.environ.get("STEAM_API_TOKEN") or None
+    if not _host_local(host) and not token:
+        raise ValueError(f"recusando ouvir em {host} sem token (use --token ou STEAM_API_TOKEN)")
+
+    class HandlerAPI(_RotasAPI, BaseHTTPRequestHandler):
+        pass
+    HandlerAPI.token = token
+
+    servidor = ThreadingHTTPServer((host, porta), HandlerAPI)
+    registrar_log(f"API headless ouvindo em http://{host}:{servidor.server_address[1]}")
+    return servidor
+
+def sincronizar_imagens(esperar=True, progresso=None):
+    # baixa as capas que faltam no catálogo; devolve quantas foram agendadas
+    if not _opcional("requests"):
+        registrar_log("requests não instalado — imagens não serão baixadas.")
+        return 0
+    catalogo = obter_catalogo()
+    catalogo.sincronizar()
+    faltando = [(n, a) for n, a in GAMES if getattr(catalogo.obter(safe_name(n)), "imagem", None) is None]
+    futs = obter_motor_downloads().baixar_todos(faltando, progresso=progresso)
+    if esperar:
+        for f in futs:
+            if not f.cancelled():
+                f.exception()  # espera sem propagar
+    return len(faltando)
+
 # ---------- Execução ----------
-if __name__ == "__main__":
-    criar_estrutura_inicial(download_images=True)
+def main_gui():
+    _carregar_tk()
+    # login aparece já; pastas, downloads e relatórios seguem em background
+    criar_estrutura_inicial(download_images=True, em_background=True)
+    obter_revalidador().iniciar()
     root = tk.Tk()
     root.geometry("1000x700")
     app = App(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        app.encerrar()
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(description="Gerenciador Steam (GUI ou linha de comando)")
+    parser.add_argument("--base", help="raiz dos arquivos (padrão: Documentos/steam_files ou $STEAM_FILES_DIR)")
+    parser.add_argument("--metricas", action="store_true", help="liga a instrumentação (despejo em Logs/metricas.json)")
+    sub = parser.add_subparsers(dest="comando")
+    sub.add_parser("gui", help="abre a interface gráfica (padrão)")
+    p = sub.add_parser("init", help="cria/atualiza a estrutura inicial")
+    p.add_argument("--sem-imagens", action="store_true")
+    p = sub.add_parser("criar-usuario", help="cria um usuário")
+    p.add_argument("nome")
+    p.add_argument("senha")
+    p.add_argument("--permissao", default="USUARIO")
+    sub.add_parser("migrar-senhas", help="troca senhas em texto puro por hash (scrypt/PBKDF2)")
+    p = sub.add_parser("usuarios", help="lista usuários")
+    p.add_argument("--prefixo", default="")
+    p.add_argument("--limite", type=int, default=None)
+    p = sub.add_parser("jogos", help="lista o catálogo")
+    p.add_argument("--busca", default="", help="filtra por nome (sem diferenciar acentos)")
+    p = sub.add_parser("biblioteca", help="lista a biblioteca de um usuário")
+    p.add_argument("usuario")
+    for nome, ajuda in (("adicionar", "adiciona jogos à biblioteca"), ("remover", "remove jogos da biblioteca")):
+        p = sub.add_parser(nome, help=ajuda)
+        p.add_argument("usuario")
+        p.add_argument("jogos", nargs="+")
+    p = sub.add_parser("conceder", help="aplica jogos a vários usuários")
+    p.add_argument("--usuarios", nargs="+", required=True)
+    grupo = p.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--jogos", nargs="+")
+    grupo.add_argument("--catalogo-inteiro", action="store_true")
+    sub.add_parser("sync-imagens", help="baixa as capas que faltam")
+    p = sub.add_parser("empacotar", help="move as capas para o pacote único (Imagens_Jogos/capas.pack)")
+    p.add_argument("--remover-soltos", action="store_true", help="apaga as capas soltas depois de empacotar")
+    p.add_argument("--compactar", action="store_true", help="reescreve o pacote sem registros mortos")
+    p = sub.add_parser("revalidar-imagens", help="revalida as capas na CDN (GET condicional)")
+    p.add_argument("--forcar", action="store_true", help="ignora o intervalo desde a última verificação")
+    p = sub.add_parser("relatorios", help="gera os relatórios que mudaram")
+    p.add_argument("--forcar", action="store_true")
+    sub.add_parser("estatisticas", help="agregados do log em JSON")
+    p = sub.add_parser("servir", help="API HTTP local (JSON)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--porta", type=int, default=8765)
+    p.add_argument("--token", help="token de admin (Authorization: Bearer); obrigatório fora do loopback")
+    return parser
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    if args.base:
+        configurar_diretorios(args.base)
+    if args.metricas or metricas.ativo:
+        metricas.ativar()
+        atexit.register(metricas.despejar)
+    comando = args.comando or "gui"
+    if comando == "gui":
+        main_gui()
+        return 0
+
+    if comando == "init":
+        criar_estrutura_inicial(download_images=False)
+        if not args.sem_imagens:
+            print(f"Capas baixadas/agendadas: {sincronizar_imagens()}")
+    elif comando == "criar-usuario":
+        criado = criar_usuario(args.nome.strip().lower(), args.senha, args.permissao.upper())
+        print("Usuário criado." if criado else "Usuário já existe.")
+        return 0 if criado else 1
+    elif comando == "migrar-senhas":
+        print(f"{migrar_senhas()} senhas migradas.")
+    elif comando == "usuarios":
+        for nome, perm in listar_usuarios(args.prefixo, args.limite):
+            print(f"{nome}\t{perm}")
+    elif comando == "jogos":
+        print("\n".join(buscar_jogos(args.busca) if args.busca else listar_jogos_empresa()))
+    elif comando == "biblioteca":
+        print("\n".join(listar_biblioteca(args.usuario)))
+    elif comando == "adicionar":
+        ignorados = {}
+        print(f"{adicionar_jogos_a_usuario(args.usuario, args.jogos, ignorados=ignorados)} jogos adicionados.")
+        if ignorados["usuarios"]:
+            print(f"Usuário inexistente: {args.usuario}", file=sys.stderr)
+            return 1
+        if ignorados["jogos"]:
+            print(f"Fora do catálogo (ignorados): {', '.join(ignorados['jogos'])}", file=sys.stderr)
+    elif comando == "remover":
+        print(f"{remover_jogos_do_usuario(args.usuario, args.jogos)} jogos removidos.")
+    elif comando == "conceder":
+        jogos = listar_jogos_empresa() if args.catalogo_inteiro else args.jogos
+        ignorados = {}
+        print(f"{conceder_jogos_a_usuarios(args.usuarios, jogos, autor='cli', ignorados=ignorados)} novos vínculos.")
+        for tipo, nomes in ignorados.items():
+            if nomes:
+                print(f"Ignorados ({tipo} inexistentes): {', '.join(nomes)}", file=sys.stderr)
+    elif comando == "sync-imagens":
+        def progresso(feitos, total, nome, caminho):
+            print(f"[{feitos}/{total}] {nome}: {'ok' if caminho else 'falhou'}")
+        print(f"{sincronizar_imagens(progresso=progresso)} capas processadas.")
+    elif comando == "empacotar":
+        n = empacotar_capas(remover_soltos=args.remover_soltos, compactar=args.compactar or None)
+        est = obter_pacote_imagens().estatisticas()
+        print(f"{n} capas gravadas; pacote com {est['entradas']} capas, {est['bytes']} bytes.")
+    elif comando == "revalidar-imagens":
+        contagem = obter_revalidador().executar(forcar=args.forcar)
+        print(", ".join(f"{k}: {v}" for k, v in sorted(contagem.items())) or "Nenhuma capa a revalidar.")
+    elif comando == "relatorios":
+        gerados = criar_relatorios_pdf(forcar=args.forcar)
+        print("\n".join(gerados) if gerados else "Relatórios já estavam atualizados.")
+    elif comando == "estatisticas":
+        print(json.dumps(obter_analise_log().resumo(), ensure_ascii=False, indent=2))
+    elif comando == "servir":
+        try:
+            servidor = servir_api(args.host, args.porta, token=args.token)
+        except ValueError as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            return 2
+        obter_revalidador().iniciar()
+        print(f"Servindo em http://{args.host}:{servidor.server_address[1]} (Ctrl+C para sair)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import os
+import time
+
+import pytest
+
+import gerenciador_steam as g
+
+pytest.importorskip("requests")
+
+
+class CdnFalsa:
+    # responde como a CDN da Steam: ETag por versão da capa e 304 para If-None-Match igual
+    def __init__(self, status=200, corpo=b"capa-v1", etag='"v1"'):
+        self.status, self.corpo, self.etag = status, corpo, etag
+        self.pedidos = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.pedidos.append(dict(headers or {}))
+        resp = type("Resposta", (), {})()
+        resp.headers = {"ETag": self.etag} if self.status == 200 else {}
+        if self.status == 200 and (headers or {}).get("If-None-Match") == self.etag:
+            resp.status_code, resp.content = 304, b""
+        else:
+            resp.status_code, resp.content = self.status, self.corpo if self.status == 200 else b""
+        return resp
+
+    def close(self):
+        pass
+
+
+def _motor(tmp_path, cdn):
+    g.configurar_diretorios(str(tmp_path))
+    motor = g.MotorDownloads(max_workers=2, tentativas=1, backoff=0)
+    motor._session = cdn
+    return motor
+
+
+def test_revalidacao_304_e_200(tmp_path):
+    cdn = CdnFalsa()
+    motor = _motor(tmp_path, cdn)
+    caminho = motor.submit("Hades", 1145360).result(5)
+    assert caminho and os.path.exists(caminho)
+    assert g.ler_meta_capa(caminho)["etag"] == '"v1"'
+    original = open(caminho, "rb").read()
+
+    assert motor.revalidar("Hades", 1145360).result(5) == "inalterada"
+    assert cdn.pedidos[-1]["If-None-Match"] == '"v1"'
+    assert open(caminho, "rb").read() == original
+
+    cdn.corpo, cdn.etag = b"capa-v2", '"v2"'
+    assert motor.revalidar("Hades", 1145360).result(5) == "atualizada"
+    assert open(caminho, "rb").read() != original
+    assert g.ler_meta_capa(caminho)["etag"] == '"v2"'
+    assert motor.revalidar("Hades", 1145360).result(5) == "inalterada"
+    motor.shutdown()
+
+
+def test_cache_negativo_com_backoff(tmp_path):
+    cdn = CdnFalsa(status=404)
+    motor = _motor(tmp_path, cdn)
+    motor.FALHA_TTL_BASE = 0.2
+    assert motor.submit("Hades", 1145360).result(5) is None
+    assert motor.em_falha_recente(1145360)
+    assert motor.submit("Hades", 1145360).result(5) is None
+    assert len(cdn.pedidos) == 1  # dentro do backoff não bate na CDN
+
+    time.sleep(0.25)
+    assert not motor.em_falha_recente(1145360)
+    assert motor.submit("Hades", 1145360).result(5) is None
+    assert len(cdn.pedidos) == 2
+    time.sleep(0.25)
+    assert motor.em_falha_recente(1145360)  # 2ª falha seguida: espera dobrou
+
+    time.sleep(0.2)
+    cdn.status = 200
+    assert motor.submit("Hades", 1145360).result(5)
+    assert not motor.em_falha_recente(1145360)
+    motor.shutdown()
@@ -0,0 +1,21 @@
+import os
+
+import gerenciador_steam as g
+
+
+def test_partida_quente_atualiza_relatorio_que_mudou(tmp_path, monkeypatch):
+    monkeypatch.setattr(g, "SCRYPT_N", 2 ** 10)
+    monkeypatch.setattr(g, "_opcionais", dict(g._opcionais, fpdf=None))  # relatórios em TXT
+    g.configurar_diretorios(str(tmp_path))
+    g.criar_estrutura_inicial(download_images=False)
+    bibliotecas = os.path.join(g.DOCS_DIR, "Relatorio_Bibliotecas.txt")
+    catalogo = os.path.join(g.DOCS_DIR, "Relatorio_Catalogo.txt")
+    assert "Usuários: 2" in open(bibliotecas, encoding="utf-8").read()
+    antes = os.path.getmtime(catalogo)
+
+    g.criar_usuario("joao", "x")
+    g.configurar_diretorios(str(tmp_path))
+    g.criar_estrutura_inicial(download_images=False)
+
+    assert "Usuários: 3" in open(bibliotecas, encoding="utf-8").read()
+    assert os.path.getmtime(catalogo) == antes  # conteúdo igual: não renderiza de novo
@@ -0,0 +1,32 @@
+import os
+
+import gerenciador_steam as g
+
+
+def test_reabre_o_log_rotacionado_por_outro_processo(tmp_path):
+    caminho = str(tmp_path / "Log_Sistema.txt")
+    log = g.RegistradorLog(caminho, intervalo=0.01)
+    log.registrar("antes")
+    log.flush()
+    os.replace(caminho, caminho + ".1")  # o outro processo rotacionou
+    log.registrar("depois")
+    log.flush()
+    log.fechar()
+    assert "antes" in open(caminho + ".1", encoding="utf-8").read()
+    assert "depois" not in open(caminho + ".1", encoding="utf-8").read()
+    assert "depois" in open(caminho, encoding="utf-8").read()
+
+
+def test_rotaciona_pelo_tamanho_real_do_arquivo(tmp_path):
+    caminho = str(tmp_path / "Log_Sistema.txt")
+    log = g.RegistradorLog(caminho, max_bytes=1000, intervalo=0.01)
+    log.registrar("primeira")
+    log.flush()
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write("x" * 990 + "\n")  # outro processo escreveu no mesmo arquivo
+    log.registrar("segunda")
+    log.flush()
+    log.fechar()
+    assert "segunda" not in open(caminho + ".1", encoding="utf-8").read()
+    assert "segunda" in open(caminho, encoding="utf-8").read()
+    assert os.path.getsize(caminho) < 1000
@@ -0,0 +1,112 @@
+import io
+import os
+
+import pytest
+
+import gerenciador_steam as g
+
+
+def test_compactar_pacote_vazio(tmp_path):
+    g.configurar_diretorios(str(tmp_path))
+    assert g.empacotar_capas(compactar=True) == 0
+    pacote = g.obter_pacote_imagens()
+    assert os.path.getsize(pacote.caminho) == 0
+    assert pacote.compactar() == 0
+    assert pacote.ler("nada") is None
+
+
+def test_compactar_de_novo_sem_registros_vivos(tmp_path):
+    pacote = g.PacoteImagens(str(tmp_path / "capas.pack"))
+    pacote.gravar("Hades", b"\x89PNG" + b"x" * 100, "png")
+    assert pacote.remover("Hades")
+    assert pacote.compactar() > 0
+    assert os.path.getsize(pacote.caminho) == 0
+    assert pacote.compactar() == 0
+    assert pacote.nomes() == []
+    pacote.fechar()
+
+
+def test_compactar_adiado_enquanto_ha_view_aberta(tmp_path):
+    pacote = g.PacoteImagens(str(tmp_path / "capas.pack"))
+    pacote.gravar("Hades", b"a" * 50, "png")
+    pacote.gravar("Hades", b"b" * 50, "png")
+    view = pacote.ler("Hades")
+    assert pacote.compactar() is None
+    assert bytes(view) == b"b" * 50
+    view.release()
+    assert pacote.compactar() > 0
+    assert bytes(pacote.ler("Hades")) == b"b" * 50
+    pacote.fechar()
+
+
+
+def test_abrir_capa_do_pacote_le_sem_prender_o_mapa(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 3), (200, 30, 30)).save(buf, "PNG")
+    png = buf.getvalue()
+    g.configurar_diretorios(str(tmp_path))
+    pacote = g.obter_pacote_imagens(criar=True)
+    pacote.gravar("Hades", png, "png")
+    with g.abrir_capa(g.PREFIXO_PACOTE + "Hades") as fonte:
+        assert fonte.read(8) == png[:8]
+        fonte.seek(0)
+        assert fonte.read() == png
+    with g.abrir_capa(g.PREFIXO_PACOTE + "Hades") as fonte, Image.open(fonte) as im:
+        assert im.size == (4, 3)
+    pacote.remover("Hades")
+    assert pacote.compactar() > 0
+
+
+def test_gravar_ler_remover_e_reabrir(tmp_path):
+    caminho = str(tmp_path / "capas.pack")
+    pacote = g.PacoteImagens(caminho)
+    pacote.gravar("Hades", b"h" * 10, "png", mtime=1.0)
+    pacote.gravar("Dota 2", b"d" * 20, "jpg", mtime=2.0)
+    pacote.gravar("Hades", b"H" * 12, "png", mtime=3.0)
+    assert pacote.remover("Dota 2")
+    assert not pacote.remover("Dota 2")
+    assert bytes(pacote.ler("Hades")) == b"H" * 12
+    assert pacote.ler("Dota 2") is None
+    assert pacote.info("Hades")[1:] == (12, "png", 3.0)
+    pacote.fechar()
+
+    for snapshot in (True, False):
+        if not snapshot:
+            os.remove(caminho + ".idx")  # sem o .idx o índice é refeito varrendo o arquivo
+        reaberto = g.PacoteImagens(caminho)
+        assert reaberto.nomes() == ["Hades"]
+        assert bytes(reaberto.ler("Hades")) == b"H" * 12
+        assert reaberto.estatisticas()["mortos"] > 0
+        reaberto.fechar()
+
+
+def test_compactar_mantem_so_os_vivos(tmp_path):
+    pacote = g.PacoteImagens(str(tmp_path / "capas.pack"))
+    for i in range(5):
+        pacote.gravar(f"jogo{i}", bytes([i]) * 100, "png")
+    for i in range(3):
+        pacote.remover(f"jogo{i}")
+    antes = os.path.getsize(pacote.caminho)
+    assert pacote.compactar() > 0
+    assert os.path.getsize(pacote.caminho) < antes
+    assert sorted(pacote.nomes()) == ["jogo3", "jogo4"]
+    assert bytes(pacote.ler("jogo4")) == b"\x04" * 100
+    assert pacote.estatisticas()["mortos"] == 0
+    pacote.fechar()
+    assert bytes(g.PacoteImagens(pacote.caminho).ler("jogo3")) == b"\x03" * 100
+
+
+def test_registro_incompleto_no_fim_e_descartado(tmp_path):
+    caminho = str(tmp_path / "capas.pack")
+    pacote = g.PacoteImagens(caminho)
+    pacote.gravar("Hades", b"h" * 10, "png")
+    pacote.fechar()
+    inteiro = os.path.getsize(caminho)
+    os.remove(caminho + ".idx")
+    with open(caminho, "ab") as f:
+        f.write(g.PacoteImagens.CABECALHO.pack(g.PacoteImagens.MAGICO, 4, 3, 1000, 0.0) + b"Rustpng" + b"x" * 10)
+    reaberto = g.PacoteImagens(caminho)
+    assert reaberto.nomes() == ["Hades"]
+    assert os.path.getsize(caminho) == inteiro
+    reaberto.fechar()
@@ -0,0 +1,41 @@
+import concurrent.futures
+import os
+
+import pytest
+
+import gerenciador_steam as g
+
+
+def _preparar(tmp_path, monkeypatch):
+    monkeypatch.setattr(g, "_opcionais", dict(g._opcionais, fpdf=None))
+    g.configurar_diretorios(str(tmp_path))
+    os.makedirs(os.path.join(g.DOCS_DIR, "Relatorio_Acessos.txt"))  # destino impossível de gravar
+
+
+def _sem_pool(*args, **kwargs):
+    raise NotImplementedError("sem processos")
+
+
+@pytest.mark.parametrize("pool", [True, False], ids=["pool", "sequencial"])
+def test_erro_num_relatorio_nao_derruba_os_outros(tmp_path, monkeypatch, pool):
+    _preparar(tmp_path, monkeypatch)
+    if not pool:
+        monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", _sem_pool)
+    gerados = g.criar_relatorios_pdf()
+    assert sorted(gerados) == ["Relatorio_Bibliotecas.txt", "Relatorio_Catalogo.txt"]
+    g._registrador.flush()
+    log = open(g.LOG_FILE, encoding="utf-8").read()
+    assert "Erro ao gerar Relatorio_Acessos" in log
+    assert ("Pool de processos indisponível" in log) != pool
+    # o que falhou não entra no manifesto: é tentado de novo na próxima vez
+    os.rmdir(os.path.join(g.DOCS_DIR, "Relatorio_Acessos.txt"))
+    assert g.criar_relatorios_pdf() == ["Relatorio_Acessos.txt"]
+
+
+def test_pdf_sem_avisos_do_fpdf(tmp_path):
+    pytest.importorskip("fpdf")
+    caminho = str(tmp_path / "r.pdf")
+    secoes = [("Resumo", ["Jogos: 2", "Ação — çã"]), ("Vazio", [])]
+    assert g._renderizar_relatorio(caminho, "Catálogo", secoes, "01/01/2026 00:00:00", True) == caminho
+    with open(caminho, "rb") as f:
+        assert f.read(5) == b"%PDF-"
@@ -0,0 +1,109 @@
+import os
+import sqlite3
+
+import pytest
+
+import gerenciador_steam as g
+
+
+def test_bootstrap_nao_deixa_senha_em_texto_puro(tmp_path, monkeypatch):
+    monkeypatch.setattr(g, "SCRYPT_N", 2 ** 10)
+    monkeypatch.setattr(g, "criar_relatorios_pdf", lambda: None)
+    g.configurar_diretorios(str(tmp_path))
+    pasta = tmp_path / "Usuarios" / "joao"
+    pasta.mkdir(parents=True)
+    (pasta / "Perfil.txt").write_text("Usuário:joao\nSenha:segredo-antigo\nPermissão:USUARIO\n", encoding="utf-8")
+    (tmp_path / "Usuarios" / "maria").mkdir()
+    (tmp_path / "Usuarios" / "maria" / "Perfil.txt.migrado").write_text("Senha:segredo-velho\n", encoding="utf-8")
+
+    g.criar_estrutura_inicial(download_images=False)
+
+    con = sqlite3.connect(g.USUARIOS_DB)
+    senhas = dict(con.execute("SELECT nome, senha FROM usuarios"))
+    con.close()
+    assert set(senhas) >= {"admin", "ryan", "joao"}
+    assert all(g._decodificar_hash(s) is not None for s in senhas.values())
+    assert g.validar_login("joao", "segredo-antigo") == "USUARIO"
+    for raiz, _pastas, arquivos in os.walk(tmp_path):
+        for nome in arquivos:
+            with open(os.path.join(raiz, nome), "rb") as f:
+                conteudo = f.read()
+            assert b"segredo-antigo" not in conteudo, nome
+            assert b"segredo-velho" not in conteudo, nome
+
+
+def test_hash_e_verificacao_de_senha(monkeypatch):
+    monkeypatch.setattr(g, "SCRYPT_N", 2 ** 10)
+    armazenado = g.hash_senha("1234")
+    assert armazenado != g.hash_senha("1234")  # sal aleatório
+    assert g.verificar_senha("1234", armazenado) == (True, False)
+    assert g.verificar_senha("4321", armazenado)[0] is False
+    # texto puro (formato antigo) confere, mas pede rehash
+    assert g.verificar_senha("1234", "1234") == (True, True)
+    assert g.verificar_senha("x", "1234") == (False, True)
+    # parâmetros mais fracos que os atuais também pedem rehash
+    monkeypatch.setattr(g, "SCRYPT_N", 2 ** 11)
+    assert g.verificar_senha("1234", armazenado) == (True, True)
+
+
+def test_hash_pbkdf2_sem_scrypt(monkeypatch):
+    monkeypatch.setattr(g, "_TEM_SCRYPT", False)
+    monkeypatch.setattr(g, "PBKDF2_ITERACOES", 1000)
+    armazenado = g.hash_senha("1234")
+    assert armazenado.startswith("pbkdf2_sha256$1000$")
+    assert g.verificar_senha("1234", armazenado) == (True, False)
+    assert g.verificar_senha("123", armazenado)[0] is False
+
+
+def test_limitador_bloqueia_com_backoff_e_libera_no_sucesso():
+    limitador = g.LimitadorLogin()
+    bloqueios = [limitador.registrar_falha("ryan", "local") for _ in range(6)]
+    assert bloqueios == [0.0, 0.0, 0.0, 1.0, 2.0, 4.0]
+    assert 3.0 < limitador.espera("ryan", "local") <= 4.0
+    assert limitador.espera("admin", "outra") == 0.0
+    limitador.registrar_sucesso("ryan")
+    assert limitador.espera("ryan", "outra") == 0.0
+
+
+def test_limitador_bloqueia_a_origem_que_tenta_muitos_usuarios():
+    limitador = g.LimitadorLogin()
+    for i in range(limitador.LIVRES_ORIGEM):
+        assert limitador.registrar_falha(f"u{i}", "10.0.0.9") == 0.0
+    assert limitador.registrar_falha("mais_um", "10.0.0.9") == limitador.BASE_S
+    assert limitador.espera("novo", "10.0.0.9") > 0
+    assert limitador.espera("novo", "10.0.0.1") == 0.0
+
+
+def test_autenticar_barra_sem_consultar_o_banco(tmp_path, monkeypatch):
+    monkeypatch.setattr(g, "SCRYPT_N", 2 ** 10)
+    monkeypatch.setattr(g, "_limitador_login", g.LimitadorLogin())
+    g.configurar_diretorios(str(tmp_path))
+    g.criar_usuario("ana", "certa")
+    for _ in range(3):
+        assert g.autenticar("ana", "errada") == (None, 0.0)
+    assert g.autenticar("ana", "errada") == (None, 1.0)
+    monkeypatch.setattr(g.ArmazemUsuarios, "obter", lambda *a: pytest.fail("consultou o banco"))
+    permissao, espera = g.autenticar("ana", "certa")
+    assert permissao is None and espera > 0
+
+
+def test_migracao_de_perfis_txt(tmp_path):
+    g.configurar_diretorios(str(tmp_path))
+    usuarios = tmp_path / "Usuarios"
+    for nome, conteudo in (("ana", "Usuário:ana\nSenha:s1\nPermissão:ADMIN\n"),
+                           ("bia", "Usuário:bia\nSenha:s2\n"),
+                           ("quebrado", "Usuário:quebrado\n")):
+        (usuarios / nome / "Biblioteca").mkdir(parents=True)
+        (usuarios / nome / "Perfil.txt").write_text(conteudo, encoding="utf-8")
+    (usuarios / "ana" / "Biblioteca" / "Hades.txt").write_text("Hades\n", encoding="utf-8")
+
+    armazem = g.obter_armazem_usuarios()
+    assert armazem.listar() == [("ana", "ADMIN"), ("bia", "USUARIO")]
+    assert sorted(armazem.sem_hash()) == ["ana", "bia"]
+    assert not (usuarios / "ana" / "Perfil.txt").exists()
+    assert (usuarios / "quebrado" / "Perfil.txt").exists()  # sem senha: fica para análise
+    assert not (usuarios / "ana" / "Biblioteca").exists()
+
+    assert g.migrar_senhas() == 2
+    assert armazem.sem_hash() == []
+    assert g.validar_login("ana", "s1") == "ADMIN"